@@ -3,17 +3,18 @@ from intent_config import PATTERN_CONFIG
 #TODO- As of now, a hardcode version is implemented to fetch entities and identify intent,
 # Going forward given the required insfrastructure, we will be using a fine tuned large LLM capable of handling similarity and semantic search and either autonomously find the intent or with liitle bit of pattern match
 
+_VALUE_TOKEN = re.compile(r"[\w.\-]*\d[\w.\-]*")
+
+
 def extract_intent(user_input: str) -> str:
     """
     Extract labelled key‑value pairs or metric names from the user query.
     Returns only values that match patterns explicitly in the input.
     """
-    intent_parts = []
-
-    for config in PATTERN_CONFIG.values():
-        match = _first_match(user_input, config["patterns"])
-        if match:
-            intent_parts.append(_format_piece(match, config))
+    intent_parts = [
+        _format_piece(match, PATTERN_CONFIG[key])
+        for key, match in extract_entities(user_input).items()
+    ]
 
     return (
         " and ".join(intent_parts)
@@ -22,6 +23,49 @@ def extract_intent(user_input: str) -> str:
     )
 
 
+def extract_entities(user_input: str) -> dict[str, str]:
+    """
+    Returns the raw value matched for each PATTERN_CONFIG key found in the query,
+    in config order, e.g. {"TEST_SUITE": "sn1", "TESTCASES_PASSED": "passed testcases"}.
+    """
+    entities = {}
+    for key, config in PATTERN_CONFIG.items():
+        match = _first_match(user_input, config["patterns"])
+        if match:
+            entities[key] = match
+    return entities
+
+
+def unextracted_values(user_input: str, entities: dict[str, str]) -> list[str]:
+    """
+    Value-like tokens of the query (they carry a digit: sn1, c-6kv, 7.6) that no
+    entity captured. extract_entities keeps one value per entity, so "sn1 and sn2"
+    leaves "sn2" here; callers that need every filter should not trust the entities.
+    """
+    extracted = {
+        value.rstrip(".").lower()
+        for key, value in entities.items()
+        if not PATTERN_CONFIG[key].get("is_metric", False)
+    }
+    tokens = (token.strip(".") for token in _VALUE_TOKEN.findall(user_input))
+    return [token for token in tokens if token.lower() not in extracted]
+
+
+def entity_spans(user_input: str) -> dict[str, tuple[int, int]]:
+    """
+    The (start, end) of the text each entity in extract_entities was matched from,
+    keyword included, e.g. {"TEST_SUITE": (26, 39)} for "... for test suite sn1?".
+    """
+    spans = {}
+    for key, config in PATTERN_CONFIG.items():
+        for pat in config["patterns"]:
+            match = re.search(pat, user_input, flags=re.IGNORECASE)
+            if match:
+                spans[key] = match.span()
+                break
+    return spans
+
+
 def _first_match(text: str, patterns: list[str]) -> str:
     """Return the first regex capture group that matches, or non-capturing match for metrics."""
     for pat in patterns:
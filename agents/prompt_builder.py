@@ -1,72 +1,81 @@
-from model_loader import load_model
-
-
-def generate_sql_query(nl_input: str, schema_hint: str):
-    # Load model and tokenizer. Cached via st.cache_resource to avoid reloading on every call.
-    # across Streamlit reruns, but the call itself is now within a function.
-    tokenizer, model = load_model()
-
-    prompt = f"""You are TestCaseSQLAgent, a transparent, reliable SQL assistant built on a Large Language Model(LLM). Your job is to convert user Natural Language (NL) queries into SQLite SQL, execute them, and present results—while showing every backend step. Follow these instructions for every request:
-
-1. SCHEMA LOADING  
-At session start (or on first user query), load this schema into memory and remind the user:
-
-  Table: test_results
-
-  Columns:  
-    • platform (TEXT) - The platform where the tests are executed (e.g., c-8kv, c-7kv, c-6kv, c-5kv, c-4kv). 
-    • test_suite (TEXT) - The type of testing performed (e.g., sn1, sn2, sn3).  
-    • testcases_passed (INTEGER) - Number of test cases that passed.  
-    • testcases_executed (INTEGER) - Total number of test cases executed.  
-    • release_version (REAL) - The software release version for which the tests were run (e.g., 7.6, 7.5, 7.2, 7.1).
-
-Internally normalize identifiers (strip special chars, lowercase) but always use the original names in generated SQL.  
-If the user hasn't provided the schema, prompt:  
-"Please provide table definitions and column names so I can build correct SQL."
-
-2. CONSISTENCY & CONTEXT  
-• **Consistency:** Similar NL queries must yield the same SQL structure and style.  
-• **Context:** Retain and reuse table names, filters, and aliases when the user references "same filters" or "that table."
-
-3. FUZZY COLUMN MATCHING  
-If the user's phrase nearly matches a column name (e.g. "testcases executed" → `testcases_executed`), pick the best fit and note:  
-"Using column `testcases_executed` for 'testcases executed'."
-If ambiguous, ask for clarification:  
-"Did you mean `testcases_passed` or `testcases_executed`?"
-
-4. SEMANTIC SYNONYMS  
-Treat:  
-  - "show", "display", "fetch", "give me" → 'SELECT'    
-  - “average” → `AVG()`, “sum” → `SUM()`, “count” → `COUNT()`
+import copy
+from threading import Thread
+import torch
+from transformers import LogitsProcessorList, StoppingCriteriaList, TextIteratorStreamer
+from config import (
+    MAX_NEW_TOKENS,
+    PROMPT_CACHE_ENABLED,
+    GENERATION_BATCH_SIZE,
+    CONSTRAINED_DECODING,
+    CONSTRAINED_TOP_K,
+)
+from model_loader import load_model, get_prompt_cache
+from agents.sql_grammar import SQLGrammar, SQLGrammarLogitsProcessor
+from agents.sql_stopping import SQLStoppingCriteria, truncate_sql_output
+from agents.prompts import get_system_prompt
+from schema_service import get_table_schema
+
+
+def _build_messages(nl_input: str) -> list[dict]:
+    """Format input as a structured chat conversation for chat-based LLMs."""
+    return [
+        {"role": "system", "content": get_system_prompt()},
+        {"role": "user", "content": nl_input},
+    ]
 
 
-5. FEW-SHOT EXAMPLES  
+def _attention_mask(input_ids, tokenizer):
+    """Create attention mask (1 for tokens to attend to, 0 for padding)."""
+    return (input_ids != tokenizer.pad_token_id).long()
 
-```
-### Example 1  
-User: "How many testcases passed on platform 'c-6kv' for version 7.6?"
 
-```sql
-SELECT testcases_passed 
-FROM test_results
-WHERE platform = 'c-6kv' AND release_version = '7.6';
+def _reusable_prompt_cache(tokenizer, model, input_ids):
+    """
+    Returns a private copy of the system prompt KV cache, cropped to the number of
+    leading tokens it shares with `input_ids`, or None if nothing can be reused.
+    """
+    prefix_ids, prompt_cache = get_prompt_cache(
+        tokenizer, model, get_system_prompt()
+    )
 
-### Example 2
-User : Display testcases executed for test suite 'sn3'?
+    # Tokenization at the system/user boundary may differ, so only trust the
+    # longest common prefix, and always leave at least one token to prefill.
+    limit = min(prefix_ids.shape[-1], input_ids.shape[-1] - 1)
+    mismatch = (prefix_ids[0, :limit] != input_ids[0, :limit]).nonzero()
+    shared = int(mismatch[0]) if len(mismatch) else limit
+    if shared == 0:
+        return None
+
+    # generate() extends the cache in place, so never hand out the shared copy
+    past_key_values = copy.deepcopy(prompt_cache)
+    past_key_values.crop(shared)
+    return past_key_values
+
+
+def _logits_processors(tokenizer, prompt_length: int, constrained: bool):
+    """Returns the grammar constraint over the real table columns, if requested."""
+    if not constrained:
+        return LogitsProcessorList()
+    schema = get_table_schema()
+    grammar = SQLGrammar(schema.table_name, schema.column_names)
+    return LogitsProcessorList(
+        [
+            SQLGrammarLogitsProcessor(
+                tokenizer, prompt_length, grammar, top_k=CONSTRAINED_TOP_K
+            )
+        ]
+    )
 
-'''sql
-SELECT testcases_executed 
-FROM test_results
-WHERE test_suite = 'sn3'; 
 
-Output:
-"""
+def _generation_kwargs(
+    nl_input: str, use_prompt_cache: bool, constrained: bool
+) -> dict:
+    """Builds the model.generate arguments for a single question."""
+    # Load model and tokenizer. Cached in the process-wide model registry, so only
+    # the first call in a process pays for loading the weights.
+    tokenizer, model = load_model()
 
-    # Format input as a structured chat conversation for chat-based LLMs
-    messages = [
-        {"role": "system", "content": prompt},
-        {"role": "user", "content": nl_input},
-    ]
+    messages = _build_messages(nl_input)
 
     # Convert messages to input token IDs for the model using chat template
     input_tokens = tokenizer.apply_chat_template(
@@ -76,21 +85,150 @@ Output:
     # Send inputs to CPU for inference (can be adjusted for GPU if needed)
     input_ids = input_tokens.to("cpu")
 
-    # Create attention mask (1 for tokens to attend to, 0 for padding)
-    attention_mask = (input_ids != tokenizer.pad_token_id).long()
+    attention_mask = _attention_mask(input_ids, tokenizer)
 
-    # Generate model output using greedy decoding (no sampling)
-    output = model.generate(
+    # Only the user turn needs prefilling when the system prompt KV cache is reused
+    past_key_values = (
+        _reusable_prompt_cache(tokenizer, model, input_ids)
+        if use_prompt_cache
+        else None
+    )
+
+    # Greedy decoding (no sampling), stopping as soon as the statement is complete
+    return dict(
         input_ids=input_ids,
         attention_mask=attention_mask,
-        max_new_tokens=100,
+        past_key_values=past_key_values,
+        max_new_tokens=MAX_NEW_TOKENS,
+        stopping_criteria=StoppingCriteriaList(
+            [SQLStoppingCriteria(tokenizer, input_ids.shape[-1])]
+        ),
+        logits_processor=_logits_processors(
+            tokenizer, input_ids.shape[-1], constrained
+        ),
         eos_token_id=tokenizer.eos_token_id,
         pad_token_id=tokenizer.pad_token_id,
         do_sample=False,
     )
 
+
+def generate_sql_query(
+    nl_input: str,
+    schema_hint: str,
+    use_prompt_cache: bool = PROMPT_CACHE_ENABLED,
+    constrained: bool = CONSTRAINED_DECODING,
+):
+    tokenizer, model = load_model()
+    generation_kwargs = _generation_kwargs(nl_input, use_prompt_cache, constrained)
+
+    # Generate model output
+    with torch.no_grad():
+        output = model.generate(**generation_kwargs)
+
     # Extract only the new generated tokens (remove input portion)
-    response = output[0][input_ids.shape[-1] :]
+    response = output[0][generation_kwargs["input_ids"].shape[-1] :]
     # Decode token IDs into human-readable SQL string
-    sql = tokenizer.decode(response, skip_special_tokens=True).strip()
-    return sql
+    sql = tokenizer.decode(response, skip_special_tokens=True)
+    return truncate_sql_output(sql)
+
+
+def stream_sql_query(
+    nl_input: str,
+    schema_hint: str,
+    use_prompt_cache: bool = PROMPT_CACHE_ENABLED,
+    constrained: bool = CONSTRAINED_DECODING,
+):
+    """
+    Generator variant of generate_sql_query that yields the partial SQL text
+    each time new tokens are decoded. The last value yielded is the final SQL.
+    """
+    tokenizer, model = load_model()
+    generation_kwargs = _generation_kwargs(nl_input, use_prompt_cache, constrained)
+    streamer = TextIteratorStreamer(
+        tokenizer, skip_prompt=True, skip_special_tokens=True
+    )
+    errors = []
+
+    def _generate():
+        try:
+            with torch.no_grad():
+                model.generate(**generation_kwargs, streamer=streamer)
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer, which would otherwise wait for tokens forever
+            streamer.end()
+
+    thread = Thread(target=_generate, daemon=True)
+    thread.start()
+
+    text = ""
+    for piece in streamer:
+        text += piece
+        yield truncate_sql_output(text)
+    thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def generate_sql_queries(
+    questions: list[str],
+    schema_hint: str = "",
+    batch_size: int = GENERATION_BATCH_SIZE,
+    constrained: bool = CONSTRAINED_DECODING,
+) -> list[str]:
+    """
+    Generates SQL for many questions with one batched model.generate call per chunk.
+    Prompts are left-padded so generation continues from aligned positions;
+    results are returned in input order.
+    """
+    tokenizer, model = load_model()
+
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    sqls = []
+    for start in range(0, len(questions), batch_size):
+        chunk = questions[start : start + batch_size]
+
+        # Render the chat template as text; the template already holds the special tokens
+        prompts = [
+            tokenizer.apply_chat_template(
+                _build_messages(question), add_generation_prompt=True, tokenize=False
+            )
+            for question in chunk
+        ]
+        # Decoder-only models must be padded on the left for batched generation;
+        # set per call so the tokenizer shared through the registry is left as is
+        inputs = tokenizer(
+            prompts,
+            return_tensors="pt",
+            padding=True,
+            padding_side="left",
+            add_special_tokens=False,
+        ).to("cpu")
+
+        prompt_length = inputs["input_ids"].shape[-1]
+        with torch.no_grad():
+            output = model.generate(
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                max_new_tokens=MAX_NEW_TOKENS,
+                stopping_criteria=StoppingCriteriaList(
+                    [SQLStoppingCriteria(tokenizer, prompt_length)]
+                ),
+                logits_processor=_logits_processors(
+                    tokenizer, prompt_length, constrained
+                ),
+                eos_token_id=tokenizer.eos_token_id,
+                pad_token_id=tokenizer.pad_token_id,
+                do_sample=False,
+            )
+
+        # Every row shares the padded prompt length, so new tokens start at the same index
+        responses = output[:, prompt_length:]
+        sqls.extend(
+            truncate_sql_output(tokenizer.decode(response, skip_special_tokens=True))
+            for response in responses
+        )
+    return sqls
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+from config import TABLE_NAME
+from schema_service import get_table_schema
+
+logger = logging.getLogger("prompts")
+
+# Meaning of the known columns; the names, types and examples come from the database
+COLUMN_DESCRIPTIONS = {
+    "platform": "The platform where the tests are executed",
+    "test_suite": "The type of testing performed",
+    "testcases_passed": "Number of test cases that passed",
+    "testcases_executed": "Total number of test cases executed",
+    "testcases_failed": "Number of test cases that failed",
+    "release_version": "The software release version for which the tests were run",
+}
+
+# Used until the table has been loaded into the database
+DEFAULT_COLUMNS = """    • platform (TEXT) - The platform where the tests are executed (e.g., c-8kv, c-7kv, c-6kv, c-5kv, c-4kv). 
+    • test_suite (TEXT) - The type of testing performed (e.g., sn1, sn2, sn3).  
+    • testcases_passed (INTEGER) - Number of test cases that passed.  
+    • testcases_executed (INTEGER) - Total number of test cases executed.  
+    • release_version (TEXT) - The software release version for which the tests were run (e.g., '7.6', '7.5', '7.2', '7.1')."""
+
+
+SYSTEM_PROMPT_TEMPLATE = """You are TestCaseSQLAgent, a transparent, reliable SQL assistant built on a Large Language Model(LLM). Your job is to convert user Natural Language (NL) queries into SQLite SQL, execute them, and present results—while showing every backend step. Follow these instructions for every request:
+
+1. SCHEMA LOADING  
+At session start (or on first user query), load this schema into memory and remind the user:
+
+  Table: {table_name}
+
+  Columns:  
+{columns}
+
+Internally normalize identifiers (strip special chars, lowercase) but always use the original names in generated SQL.  
+If the user hasn't provided the schema, prompt:  
+"Please provide table definitions and column names so I can build correct SQL."
+
+2. CONSISTENCY & CONTEXT  
+• **Consistency:** Similar NL queries must yield the same SQL structure and style.  
+• **Context:** Retain and reuse table names, filters, and aliases when the user references "same filters" or "that table."
+
+3. FUZZY COLUMN MATCHING  
+If the user's phrase nearly matches a column name (e.g. "testcases executed" → `testcases_executed`), pick the best fit and note:  
+"Using column `testcases_executed` for 'testcases executed'."
+If ambiguous, ask for clarification:  
+"Did you mean `testcases_passed` or `testcases_executed`?"
+
+4. SEMANTIC SYNONYMS  
+Treat:  
+  - "show", "display", "fetch", "give me" → 'SELECT'    
+  - “average” → `AVG()`, “sum” → `SUM()`, “count” → `COUNT()`
+
+
+5. FEW-SHOT EXAMPLES  
+
+```
+### Example 1  
+User: "How many testcases passed on platform 'c-6kv' for version 7.6?"
+
+```sql
+SELECT testcases_passed 
+FROM test_results
+WHERE platform = 'c-6kv' AND release_version = '7.6';
+
+### Example 2
+User : Display testcases executed for test suite 'sn3'?
+
+'''sql
+SELECT testcases_executed 
+FROM test_results
+WHERE test_suite = 'sn3'; 
+
+Output:
+"""
+
+
+def _format_columns(schema) -> str:
+    lines = []
+    for name, declared_type in schema.columns:
+        line = f"    • {name} ({declared_type})"
+        if name in COLUMN_DESCRIPTIONS:
+            line += f" - {COLUMN_DESCRIPTIONS[name]}"
+        if schema.samples.get(name):
+            examples = ", ".join(str(value) for value in schema.samples[name])
+            line += f" (e.g., {examples})"
+        lines.append(line + ".")
+    return "\n".join(lines)
+
+
+def get_system_prompt() -> str:
+    """
+    Renders the system prompt with the live table schema, so the column list stays
+    accurate when columns change.
+    """
+    try:
+        schema = get_table_schema()
+        return SYSTEM_PROMPT_TEMPLATE.format(
+            table_name=schema.table_name, columns=_format_columns(schema)
+        )
+    except Exception as e:
+        logger.warning("Schema unavailable, using the default column list: %s", e)
+        return SYSTEM_PROMPT_TEMPLATE.format(
+            table_name=TABLE_NAME, columns=DEFAULT_COLUMNS
+        )
+
+
+def prompt_version() -> str:
+    """Short hash of the system prompt, so anything derived from it can be invalidated."""
+    return hashlib.sha256(get_system_prompt().encode("utf-8")).hexdigest()[:12]
@@ -1,5 +1,30 @@
+import asyncio
+import queue
 import sqlite3
-from config import DB_PATH
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from agents.sql_analysis import analyze_sql
+from config import (
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_MMAP_SIZE,
+    DB_CACHE_SIZE_KB,
+    DB_STATEMENT_CACHE_SIZE,
+    QUERY_CONCURRENCY,
+    QUERY_QUEUE_LIMIT,
+    MAX_RESULT_ROWS,
+)
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection frees up within the pool timeout."""
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the query executor already holds as much work as it accepts."""
 
 
 def get_db_connection():
@@ -9,6 +34,238 @@ def get_db_connection():
     return conn
 
 
+class ConnectionPool:
+    """
+    Bounded pool of read-only SQLite connections. Connections are handed to one
+    thread at a time, health-checked on checkout and reused most-recently-returned
+    first, so their page cache and statement cache stay warm.
+    """
+
+    def __init__(
+        self, db_path=DB_PATH, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT
+    ):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._wal_checked = False
+        self._metrics = {
+            "created": 0,
+            "closed": 0,
+            "in_use": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def _ensure_wal(self):
+        # journal_mode is persistent but can only be changed by a writable connection
+        with self._lock:
+            if self._wal_checked:
+                return
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+            self._wal_checked = True
+
+    def _connect(self) -> sqlite3.Connection:
+        self._ensure_wal()
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,  # The pool guarantees one thread at a time
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row  # This allows accessing columns by name
+        conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA query_only=ON")
+        with self._lock:
+            self._metrics["created"] += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._metrics["closed"] += 1
+
+    def _healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            with self._lock:
+                self._metrics["health_check_failures"] += 1
+            return False
+
+    def _checkout(self) -> sqlite3.Connection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._healthy(conn):
+                return conn
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Yields a pooled connection, waiting up to `timeout` seconds for a free slot."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._metrics["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No database connection available within {self.timeout} seconds."
+            )
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._metrics["in_use"] += 1
+            self._metrics["checkouts"] += 1
+            self._metrics["total_wait_seconds"] += waited
+            self._metrics["max_wait_seconds"] = max(
+                self._metrics["max_wait_seconds"], waited
+            )
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+            with self._lock:
+                self._metrics["in_use"] -= 1
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        """Snapshot of pool counters, plus idle count and mean wait."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot["idle"] = self._idle.qsize()
+        snapshot["max_size"] = self.max_size
+        snapshot["mean_wait_seconds"] = (
+            snapshot["total_wait_seconds"] / snapshot["checkouts"]
+            if snapshot["checkouts"]
+            else 0.0
+        )
+        return snapshot
+
+    def close_all(self):
+        """Closes every idle connection; checked-out ones close when returned later."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+# Shared by every request handled in this process
+db_pool = ConnectionPool()
+
+
+class QuerySlot:
+    """
+    One running-or-queued place in a BoundedQueryExecutor, held across several
+    calls (e.g. for the lifetime of a streamed result). Work submitted through it
+    runs on the executor's threads without taking another place.
+    """
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._released = False
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) on the executor's threads and awaits its result."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor._threads, fn, *args
+        )
+
+    def release(self, succeeded: bool = True):
+        """Gives the place back; later calls are ignored."""
+        if not self._released:
+            self._released = True
+            self._executor._release(succeeded)
+
+
+class BoundedQueryExecutor:
+    """
+    Runs blocking database work on a dedicated thread pool so it never blocks the
+    event loop. At most `max_workers` queries run at once and `max_queued` wait;
+    anything beyond that is rejected immediately with QueueFullError.
+    """
+
+    def __init__(self, max_workers=QUERY_CONCURRENCY, max_queued=QUERY_QUEUE_LIMIT):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._threads = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="sql-query"
+        )
+        self._pending = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> QuerySlot:
+        """Takes a place for work spanning several calls; release it when done."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queued:
+                self._rejected += 1
+                raise QueueFullError(
+                    f"{self._pending} queries already running or queued."
+                )
+            self._pending += 1
+        return QuerySlot(self)
+
+    def _release(self, succeeded: bool):
+        with self._lock:
+            self._pending -= 1
+            if succeeded:
+                self._completed += 1
+            else:
+                self._failed += 1
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) on the executor and awaits its result."""
+        slot = self.reserve()
+        succeeded = False
+        try:
+            result = await slot.run(fn, *args)
+            succeeded = True
+            return result
+        finally:
+            slot.release(succeeded)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "pending": self._pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+
+# Sized to the pool so running queries never wait on a connection
+query_executor = BoundedQueryExecutor()
+
+
 def execute_query(connection, sql_query):
     """
     Executes an SQL query on the given SQLite connection.
@@ -18,3 +275,35 @@ def execute_query(connection, sql_query):
     result = cursor.fetchall()
     col_names = [desc[0] for desc in cursor.description]
     return result, col_names
+
+
+def execute_query_capped(connection, sql_query, max_rows=MAX_RESULT_ROWS, params=()):
+    """
+    Like execute_query, but fetches at most `max_rows` rows.
+    Returns (rows, column names, truncated) where truncated means more rows existed.
+    """
+    cursor = connection.execute(sql_query, params)
+    result = cursor.fetchmany(max_rows + 1)
+    col_names = [desc[0] for desc in cursor.description]
+    truncated = len(result) > max_rows
+    return result[:max_rows], col_names, truncated
+
+
+def paginate_query(sql_query: str) -> str:
+    """
+    Wraps a SELECT so one page can be fetched with (limit, offset) parameters.
+    Pages are only stable across requests if the query has an ORDER BY.
+    Trailing comments are dropped and the closing paren goes on its own line, so
+    no comment left in the query can swallow it.
+    """
+    inner = analyze_sql(sql_query).statement
+    return f"SELECT * FROM ({inner}\n) LIMIT ? OFFSET ?"
+
+
+def explain_query_plan(connection, sql_query):
+    """
+    Returns the detail lines of SQLite's EXPLAIN QUERY PLAN for the query,
+    e.g. ["SEARCH test_results USING INDEX idx_test_results_platform (platform=?)"].
+    """
+    cursor = connection.execute(f"EXPLAIN QUERY PLAN {sql_query}")
+    return [row[3] for row in cursor.fetchall()]
@@ -0,0 +1,267 @@
+import re
+import sqlite3
+import threading
+import time
+from config import (
+    QUERY_MAX_PLAN_COST,
+    QUERY_MAX_VM_STEPS,
+    QUERY_TIME_BUDGET_SECONDS,
+    QUERY_PROGRESS_INTERVAL,
+)
+
+# "SCAN t", "SCAN t AS a USING COVERING INDEX i", "SEARCH t USING INDEX i (a=? AND b>?)",
+# "SEARCH t USING INTEGER PRIMARY KEY (rowid=?)"
+_PLAN_STEP_RE = re.compile(
+    r"^(?P<op>SCAN|SEARCH) (?P<table>\S+)(?: AS \S+)?"
+    r"(?: USING (?:COVERING )?INDEX (?P<index>\S+))?"
+    r"(?: USING (?:INTEGER )?PRIMARY KEY)?"
+    r"(?: \((?P<constraints>[^)]*)\))?"
+)
+
+# Subtrees that build a CTE or FROM-clause subquery, later scanned by that name
+_DERIVED_RE = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (?P<name>\S+)")
+
+# Table references in FROM/JOIN lists, to map plan aliases ("SCAN a") back to tables
+_TABLE_REF_RE = re.compile(
+    r"(?:\bFROM|\bJOIN|,)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?",
+    re.IGNORECASE,
+)
+_NOT_ALIASES = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "outer",
+    "on", "using", "group", "order", "limit", "having", "union", "except", "intersect",
+    "window", "from", "as",
+}
+
+
+def _table_aliases(sql_query: str) -> dict:
+    aliases = {}
+    for table, alias in _TABLE_REF_RE.findall(sql_query):
+        if alias and alias.lower() not in _NOT_ALIASES:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+class QueryRejected(Exception):
+    """Raised when a query trips one of the guards; carries a structured error."""
+
+    def __init__(self, guard: str, message: str, limit=None):
+        super().__init__(message)
+        self.guard = guard
+        self.message = message
+        self.limit = limit
+
+    def to_detail(self) -> dict:
+        return {
+            "error": "query_rejected",
+            "guard": self.guard,
+            "message": self.message,
+            "limit": self.limit,
+        }
+
+
+class QueryBudget:
+    """
+    Context manager that caps the VM instructions and wall-clock time spent on a
+    connection via SQLite's progress handler. When a budget is exhausted SQLite
+    interrupts the statement and the resulting error is re-raised as QueryRejected.
+    Time only counts while the budget is running: pause() it while the caller does
+    work outside SQLite (e.g. a stream waiting on a slow client) and resume() it
+    before the next call into SQLite.
+    """
+
+    def __init__(self, guard, connection):
+        self.guard = guard
+        self.connection = connection
+        self.tripped = None
+        self._steps = 0
+        self._spent = 0.0
+        self._started = None
+
+    def _progress(self) -> int:
+        self._steps += self.guard.progress_interval
+        if self._steps > self.guard.max_vm_steps:
+            self.tripped = "op_budget"
+            return 1
+        if self.elapsed() > self.guard.time_budget:
+            self.tripped = "time_budget"
+            return 1
+        return 0
+
+    def elapsed(self) -> float:
+        """Seconds spent running, excluding paused intervals."""
+        if self._started is None:
+            return self._spent
+        return self._spent + time.perf_counter() - self._started
+
+    def pause(self):
+        if self._started is not None:
+            self._spent += time.perf_counter() - self._started
+            self._started = None
+
+    def resume(self):
+        if self._started is None:
+            self._started = time.perf_counter()
+
+    def rejection(self) -> QueryRejected:
+        """The QueryRejected for the budget that interrupted the query."""
+        self.guard._count(self.tripped)
+        if self.tripped == "op_budget":
+            return QueryRejected(
+                "op_budget",
+                "Query exceeded its budget of SQLite VM instructions.",
+                self.guard.max_vm_steps,
+            )
+        return QueryRejected(
+            "time_budget",
+            f"Query ran longer than {self.guard.time_budget} seconds.",
+            self.guard.time_budget,
+        )
+
+    def __enter__(self):
+        self.resume()
+        self.connection.set_progress_handler(self._progress, self.guard.progress_interval)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.set_progress_handler(None, 0)
+        if isinstance(exc, sqlite3.OperationalError) and self.tripped:
+            raise self.rejection() from exc
+        return False
+
+
+class QueryGuard:
+    """
+    Guard layer for generated SQL: rejects statements whose EXPLAIN QUERY PLAN
+    estimates too many rows visited (full scans multiplied through nested loops,
+    e.g. cartesian self-joins), bounds execution with a QueryBudget and counts
+    how often each guard trips.
+    """
+
+    def __init__(
+        self,
+        max_plan_cost=QUERY_MAX_PLAN_COST,
+        max_vm_steps=QUERY_MAX_VM_STEPS,
+        time_budget=QUERY_TIME_BUDGET_SECONDS,
+        progress_interval=QUERY_PROGRESS_INTERVAL,
+    ):
+        self.max_plan_cost = max_plan_cost
+        self.max_vm_steps = max_vm_steps
+        self.time_budget = time_budget
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self.stats = {
+            "plan_checks": 0,
+            "plan_cost": 0,
+            "op_budget": 0,
+            "time_budget": 0,
+            "row_limit": 0,
+        }
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def record_row_limit(self):
+        """Counts a result truncated at the server's row limit."""
+        self._count("row_limit")
+
+    @staticmethod
+    def _stat(connection, column: str, name: str) -> list[int]:
+        """ANALYZE statistics for a table or index: [rows, rows per key prefix...]."""
+        try:
+            row = connection.execute(
+                f"SELECT stat FROM sqlite_stat1 WHERE {column} = ? LIMIT 1", (name,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return []  # ANALYZE has never run
+        return [int(value) for value in row[0].split() if value.isdigit()] if row else []
+
+    def _table_rows(self, connection, table: str) -> int:
+        stat = self._stat(connection, "tbl", table)
+        if stat:
+            return stat[0]
+        try:
+            return connection.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+        except sqlite3.Error:
+            return 1  # Subquery results and other plan pseudo-tables
+
+    def _step_rows(self, connection, detail: str, aliases: dict, derived: dict) -> float:
+        """
+        Estimated rows one SCAN/SEARCH step visits per execution. `derived` maps
+        CTE and subquery names to the rows their subtree was estimated to produce.
+        """
+        match = _PLAN_STEP_RE.match(detail)
+        if not match or match["table"] == "CONSTANT":
+            return 1
+        table = aliases.get(match["table"].lower(), match["table"])
+        if table.lower() in derived:
+            rows = derived[table.lower()]
+        else:
+            rows = self._table_rows(connection, table)
+        if match["op"] == "SCAN":
+            return rows
+
+        constraints = match["constraints"] or ""
+        if "rowid=" in constraints:
+            return 1
+        equalities = len(re.findall(r"=\?", constraints))
+        if match["index"] and equalities:
+            stat = self._stat(connection, "idx", match["index"])
+            if len(stat) > equalities:
+                return stat[equalities]
+        # No statistics: assume a range or partial match still narrows the search
+        return max(1, rows ** 0.5)
+
+    def estimate_cost(self, connection, sql_query: str) -> tuple[float, list[str]]:
+        """
+        Estimated rows visited by the query, and its plan lines. Steps sharing a
+        parent run as nested loops (their rows multiply); separate subtrees add.
+        A materialized CTE or subquery is assumed to produce as many rows as its
+        subtree visits, so joining it with itself multiplies like a table would.
+        """
+        plan = connection.execute(f"EXPLAIN QUERY PLAN {sql_query}").fetchall()
+        aliases = _table_aliases(sql_query)
+        loops = {}
+        derived_nodes = {}
+        for node, parent, _, detail in plan:
+            derived = _DERIVED_RE.match(detail)
+            if derived:
+                derived_nodes[derived["name"].lower()] = node
+            elif detail.startswith(("SCAN", "SEARCH")):
+                derived_rows = {
+                    name: loops.get(node_id, 1) for name, node_id in derived_nodes.items()
+                }
+                rows = self._step_rows(connection, detail, aliases, derived_rows)
+                loops[parent] = loops.get(parent, 1) * rows
+        return sum(loops.values()), [row[3] for row in plan]
+
+    def check_plan(self, connection, sql_query: str):
+        """Raises QueryRejected if the query's estimated cost exceeds the limit."""
+        self._count("plan_checks")
+        cost, plan = self.estimate_cost(connection, sql_query)
+        if cost > self.max_plan_cost:
+            self._count("plan_cost")
+            raise QueryRejected(
+                "plan_cost",
+                f"Query plan would visit about {cost:,.0f} rows "
+                f"(limit {self.max_plan_cost:,}): {'; '.join(plan)}. "
+                "Add filters or avoid joining the table with itself.",
+                self.max_plan_cost,
+            )
+
+    def budget(self, connection) -> QueryBudget:
+        return QueryBudget(self, connection)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = dict(self.stats)
+        snapshot.update(
+            max_plan_cost=self.max_plan_cost,
+            max_vm_steps=self.max_vm_steps,
+            time_budget_seconds=self.time_budget,
+        )
+        return snapshot
+
+
+# Shared by every request handled in this process
+query_guard = QueryGuard()
@@ -0,0 +1,348 @@
+import re
+from functools import lru_cache
+
+AGGREGATES = ("SUM", "COUNT", "AVG", "MIN", "MAX", "TOTAL", "GROUP_CONCAT")
+
+# Whitespace and comments match without a named group and are skipped
+_TOKEN_RE = re.compile(
+    r"\s+|--[^\n]*|/\*[\s\S]*?(?:\*/|\Z)"
+    r"|(?P<string>'(?:[^']|'')*')"
+    r"|(?P<ident>\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])"
+    r"|(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)"
+    r"|(?P<word>[A-Za-z_][A-Za-z0-9_$]*)"
+    r"|(?P<op><=|>=|!=|<>|==|=|<|>|\|\|)"
+    r"|(?P<punct>[(),.;*+\-/%?])"
+)
+
+# Top-level keywords that start a clause of a simple SELECT
+_CLAUSES = {
+    "SELECT": "select",
+    "FROM": "from",
+    "WHERE": "where",
+    "GROUP": "group_by",
+    "HAVING": "having",
+    "ORDER": "order_by",
+    "LIMIT": "limit",
+}
+# Constructs the analysis does not model; such queries are marked not simple
+_COMPOUND = {"UNION", "INTERSECT", "EXCEPT", "WITH", "WINDOW", "VALUES"}
+
+
+class Token:
+    __slots__ = ("kind", "text", "start", "end", "depth")
+
+    def __init__(self, kind, text, start, end, depth):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+        self.depth = depth
+
+    @property
+    def keyword(self) -> str:
+        return self.text.upper() if self.kind == "word" else ""
+
+
+class SelectItem:
+    """One projection entry: its text, the column it reads, aggregate and alias."""
+
+    def __init__(self, expression, column=None, aggregate=None, alias=None):
+        self.expression = expression
+        self.column = column
+        self.aggregate = aggregate
+        self.alias = alias
+
+    def __repr__(self):
+        return (
+            f"SelectItem({self.expression!r}, column={self.column!r}, "
+            f"aggregate={self.aggregate!r}, alias={self.alias!r})"
+        )
+
+
+class Predicate:
+    """One WHERE condition; `column`/`op`/`value` are set for column-op-literal forms."""
+
+    def __init__(self, text, column=None, op=None, value=None):
+        self.text = text
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def __repr__(self):
+        return f"Predicate({self.text!r}, column={self.column!r}, op={self.op!r})"
+
+
+def _tokenize(sql: str) -> list[Token] | None:
+    tokens, pos, depth = [], 0, 0
+    while pos < len(sql):
+        match = _TOKEN_RE.match(sql, pos)
+        if not match:
+            return None
+        pos = match.end()
+        kind = match.lastgroup
+        if kind is None:
+            continue  # Whitespace or a comment
+        text = match.group(kind)
+        if text == ")":
+            depth -= 1
+        tokens.append(Token(kind, text, match.start(), match.end(), depth))
+        if text == "(":
+            depth += 1
+    return tokens if depth == 0 else None
+
+
+def _split(tokens: list[Token], separator: str) -> list[list[Token]]:
+    """Splits a token list on a top-level punctuation token."""
+    base = tokens[0].depth if tokens else 0
+    parts, current = [], []
+    for token in tokens:
+        if token.text == separator and token.depth == base:
+            parts.append(current)
+            current = []
+        else:
+            current.append(token)
+    parts.append(current)
+    return parts
+
+
+def _identifier(token: Token) -> str:
+    if token.kind == "ident":
+        return token.text[1:-1]
+    return token.text
+
+
+def _literal(token: Token):
+    if token.kind == "string":
+        return token.text[1:-1].replace("''", "'")
+    if token.kind == "number":
+        return float(token.text) if any(c in token.text for c in ".eE") else int(token.text)
+    return token.text
+
+
+def _column_ref(tokens: list[Token]) -> str | None:
+    """Column name if the tokens are a plain (optionally table-qualified) column."""
+    if len(tokens) == 1 and tokens[0].kind in ("word", "ident"):
+        return _identifier(tokens[0])
+    if (
+        len(tokens) == 3
+        and tokens[1].text == "."
+        and tokens[0].kind in ("word", "ident")
+        and tokens[2].kind in ("word", "ident")
+    ):
+        return _identifier(tokens[2])
+    return None
+
+
+class SQLAnalysis:
+    """
+    A query parsed once into the parts later stages need: projection (with
+    aggregates and aliases), table, WHERE predicates, grouping, ordering and limit.
+    Clause texts are slices of the original SQL, so rewrites keep literals intact.
+    `simple` is False for anything beyond a single-table-expression SELECT
+    (compound queries, CTEs, unparseable text); consumers then fall back safely.
+    `statement` is the SQL without its terminating semicolon and trailing comments,
+    safe to embed in a larger query.
+    """
+
+    def __init__(self, sql: str):
+        self.sql = sql.strip()
+        self.statement = self.sql.rstrip(";").strip()
+        self.is_select = bool(re.match(r"\s*SELECT\b", self.sql, re.IGNORECASE))
+        self.simple = False
+        self.distinct = False
+        self.projection: list[SelectItem] = []
+        self.table = None
+        self.from_clause = ""
+        self.joins = False
+        self.where = ""
+        self.predicates: list[Predicate] = []
+        self.group_by: list[str] = []
+        self.having = ""
+        self.order_by: list[tuple[str, str]] = []
+        self.limit = ""
+        self._parse()
+
+    def _clause_text(self, tokens: list[Token]) -> str:
+        return self.sql[tokens[0].start : tokens[-1].end] if tokens else ""
+
+    def _parse(self):
+        tokens = _tokenize(self.sql)
+        if not tokens or not self.is_select:
+            return
+        # A trailing semicolon ends the statement; anything after it is a second one
+        if tokens[-1].text == ";":
+            tokens = tokens[:-1]
+        if tokens:
+            self.statement = self.sql[: tokens[-1].end]
+        if any(t.text == ";" or t.keyword in _COMPOUND for t in tokens):
+            return
+
+        clauses, current = {}, None
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            name = _CLAUSES.get(token.keyword) if token.depth == 0 else None
+            if name:
+                if name in clauses:
+                    return  # Repeated clause: not a simple SELECT
+                current = clauses[name] = []
+                if name in ("group_by", "order_by"):
+                    if index + 1 >= len(tokens) or tokens[index + 1].keyword != "BY":
+                        return
+                    index += 1
+            elif current is None:
+                return
+            else:
+                current.append(token)
+            index += 1
+
+        if not clauses.get("select") or not clauses.get("from"):
+            return
+        self._parse_projection(clauses["select"])
+        self._parse_from(clauses["from"])
+        if "where" in clauses:
+            self.where = self._clause_text(clauses["where"])
+            self.predicates = self._parse_predicates(clauses["where"])
+        if "group_by" in clauses:
+            self.group_by = [self._clause_text(p) for p in _split(clauses["group_by"], ",")]
+        if "having" in clauses:
+            self.having = self._clause_text(clauses["having"])
+        if "order_by" in clauses:
+            self.order_by = self._parse_ordering(clauses["order_by"])
+        if "limit" in clauses:
+            self.limit = self._clause_text(clauses["limit"])
+        self.simple = bool(self.projection) and self.table is not None
+
+    def _parse_projection(self, tokens: list[Token]):
+        if tokens and tokens[0].keyword in ("DISTINCT", "ALL"):
+            self.distinct = tokens[0].keyword == "DISTINCT"
+            tokens = tokens[1:]
+        for part in _split(tokens, ","):
+            if not part:
+                self.projection = []
+                return
+            alias = None
+            if len(part) >= 3 and part[-2].keyword == "AS":
+                alias, part = _identifier(part[-1]), part[:-2]
+            elif (
+                # Implicit alias: "SUM(x) total", "platform p"
+                len(part) >= 2
+                and part[-1].kind in ("word", "ident")
+                and part[-1].keyword not in ("END", "NULL", "TRUE", "FALSE")
+                and (part[-2].text == ")" or part[-2].kind in ("word", "ident"))
+            ):
+                alias, part = _identifier(part[-1]), part[:-1]
+            self.projection.append(self._select_item(part, alias))
+
+    def _select_item(self, part: list[Token], alias) -> SelectItem:
+        expression = self._clause_text(part)
+        if len(part) == 1 and part[0].text == "*":
+            return SelectItem(expression)
+        if (
+            len(part) >= 3
+            and part[0].keyword in AGGREGATES
+            and part[1].text == "("
+            and part[-1].text == ")"
+            and part[-1].depth == part[0].depth
+            and all(t.depth > part[0].depth for t in part[2:-1])
+        ):
+            inner = part[2:-1]
+            if inner and inner[0].keyword == "DISTINCT":
+                inner = inner[1:]
+            column = _column_ref(inner)
+            return SelectItem(expression, column, part[0].keyword, alias)
+        return SelectItem(expression, _column_ref(part), None, alias)
+
+    def _parse_from(self, tokens: list[Token]):
+        self.from_clause = self._clause_text(tokens)
+        if tokens and tokens[0].kind in ("word", "ident"):
+            self.table = _identifier(tokens[0])
+        self.joins = any(
+            t.depth == 0 and (t.text == "," or t.keyword == "JOIN") for t in tokens
+        )
+
+    def _parse_predicates(self, tokens: list[Token]) -> list[Predicate]:
+        predicates, current, in_between = [], [], False
+        for token in tokens:
+            if token.depth == 0 and token.keyword == "BETWEEN":
+                in_between = True
+            elif token.depth == 0 and token.keyword in ("AND", "OR"):
+                if token.keyword == "AND" and in_between:
+                    in_between = False
+                else:
+                    predicates.append(self._predicate(current))
+                    current = []
+                    continue
+            current.append(token)
+        predicates.append(self._predicate(current))
+        return predicates
+
+    def _predicate(self, tokens: list[Token]) -> Predicate:
+        text = self._clause_text(tokens)
+        # column <op> literal, where column may be table-qualified
+        if len(tokens) >= 3 and tokens[-1].kind in ("string", "number"):
+            op = tokens[-2]
+            column = _column_ref(tokens[:-2])
+            if column and (op.kind == "op" or op.keyword == "LIKE"):
+                return Predicate(text, column, op.text.upper(), _literal(tokens[-1]))
+        return Predicate(text)
+
+    def _parse_ordering(self, tokens: list[Token]) -> list[tuple[str, str]]:
+        ordering = []
+        for part in _split(tokens, ","):
+            direction = "ASC"
+            if part and part[-1].keyword in ("ASC", "DESC"):
+                direction, part = part[-1].keyword, part[:-1]
+            ordering.append((self._clause_text(part), direction))
+        return ordering
+
+    # --- Views consumed by the app --- #
+
+    @property
+    def aggregates(self) -> list[SelectItem]:
+        return [item for item in self.projection if item.aggregate]
+
+    @property
+    def selected_columns(self) -> list[str]:
+        """Columns read by the projection (aggregate arguments included); [] for *."""
+        if not self.simple or any(item.expression == "*" for item in self.projection):
+            return []
+        return [item.column or item.expression for item in self.projection]
+
+    @property
+    def metric_column(self) -> str | None:
+        """The column of a single-item projection (plain or aggregated), if any."""
+        if self.simple and len(self.projection) == 1:
+            return self.projection[0].column
+        return None
+
+    @property
+    def conditions(self) -> str:
+        return self.where or "No conditions"
+
+    def visualization_sql(self) -> str:
+        """
+        SELECT * over the same table and filters, so charts get full rows.
+        Grouping goes (with the ordering and limit that apply to the groups), since
+        every row is wanted; ORDER BY and LIMIT stay for ungrouped queries.
+        """
+        if not self.simple:
+            return self.sql
+        parts = [f"SELECT * FROM {self.from_clause}"]
+        if self.where:
+            parts.append(f"WHERE {self.where}")
+        if not (self.group_by or self.aggregates):
+            if self.order_by:
+                parts.append(
+                    "ORDER BY "
+                    + ", ".join(f"{expr} {direction}" for expr, direction in self.order_by)
+                )
+            if self.limit:
+                parts.append(f"LIMIT {self.limit}")
+        return " ".join(parts)
+
+
+@lru_cache(maxsize=256)
+def analyze_sql(sql: str) -> SQLAnalysis:
+    """Parses a query once; repeat calls for the same text return the cached analysis."""
+    return SQLAnalysis(sql)
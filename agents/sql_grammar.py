@@ -0,0 +1,233 @@
+import re
+import torch
+from transformers import LogitsProcessor
+
+# Grammar accepted in constrained mode (keywords are case-insensitive):
+#   SELECT ( * | item [, item]* ) FROM <table>
+#     [WHERE column op value [(AND | OR) column op value]*]
+#     [GROUP BY column [, column]*]
+#     [ORDER BY column [ASC | DESC] [, column [ASC | DESC]]*]
+#     [LIMIT integer] [;]
+#   item := (column | AGG '(' (column | *) ')') [AS alias]
+
+AGGREGATES = ("SUM", "COUNT", "AVG", "MIN", "MAX")
+KEYWORDS = (
+    "SELECT", "FROM", "WHERE", "AND", "OR", "AS", "GROUP", "ORDER", "BY",
+    "ASC", "DESC", "LIMIT", "LIKE",
+) + AGGREGATES
+OPERATORS = ("=", "!=", "<>", "<", ">", "<=", ">=")
+# Longest run of whitespace the generated text may end with; the lexer accepts any
+# amount, so without a cap the model could emit blanks until max_new_tokens
+MAX_WHITESPACE_RUN = 2
+
+_LEXEME_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<word>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<num>\d+(?:\.\d*)?)"
+    r"|(?P<str>'(?:[^']|'')*'?)"
+    r"|(?P<op><=|>=|!=|<>|=|<|>|!)"
+    r"|(?P<punct>[(),*;])"
+    r")"
+)
+
+# Transitions per state: (terminal kind, terminal value, next state)
+_CLAUSE_TAIL = [
+    ("kw", "GROUP", "group"),
+    ("kw", "ORDER", "order"),
+    ("kw", "LIMIT", "limit"),
+    ("punct", ";", "end"),
+]
+_TRANSITIONS = {
+    "start": [("kw", "SELECT", "select")],
+    "select": [
+        ("punct", "*", "star"),
+        ("col", None, "item_end"),
+        ("agg", None, "agg_open"),
+    ],
+    "star": [("kw", "FROM", "table")],
+    "agg_open": [("punct", "(", "agg_arg")],
+    "agg_arg": [("col", None, "agg_close"), ("punct", "*", "agg_close")],
+    "agg_close": [("punct", ")", "item_end")],
+    "item_end": [
+        ("punct", ",", "next_item"),
+        ("kw", "AS", "alias"),
+        ("kw", "FROM", "table"),
+    ],
+    "next_item": [("col", None, "item_end"), ("agg", None, "agg_open")],
+    "alias": [("ident", None, "aliased")],
+    "aliased": [("punct", ",", "next_item"), ("kw", "FROM", "table")],
+    "table": [("table", None, "from_done")],
+    "from_done": [("kw", "WHERE", "pred")] + _CLAUSE_TAIL,
+    "pred": [("col", None, "op")],
+    "op": [("op", None, "value"), ("kw", "LIKE", "like_value")],
+    "value": [("num", None, "pred_done"), ("str", None, "pred_done")],
+    "like_value": [("str", None, "pred_done")],
+    "pred_done": [("kw", "AND", "pred"), ("kw", "OR", "pred")] + _CLAUSE_TAIL,
+    "group": [("kw", "BY", "group_col")],
+    "group_col": [("col", None, "group_done")],
+    "group_done": [("punct", ",", "group_col")] + _CLAUSE_TAIL[1:],
+    "order": [("kw", "BY", "order_col")],
+    "order_col": [("col", None, "order_dir")],
+    "order_dir": [
+        ("kw", "ASC", "order_done"),
+        ("kw", "DESC", "order_done"),
+        ("punct", ",", "order_col"),
+    ]
+    + _CLAUSE_TAIL[2:],
+    "order_done": [("punct", ",", "order_col")] + _CLAUSE_TAIL[2:],
+    "limit": [("int", None, "limit_done")],
+    "limit_done": [("punct", ";", "end")],
+    "end": [],
+}
+_ACCEPTING = {
+    "from_done", "pred_done", "group_done", "order_dir", "order_done",
+    "limit_done", "end",
+}
+
+
+class SQLGrammar:
+    """
+    Prefix checker for SELECT statements over one table and its real columns.
+    Used to decide, token by token, whether generated text can still become valid SQL.
+    """
+
+    def __init__(self, table: str, columns: list[str]):
+        self.table = table.lower()
+        self.columns = tuple(col.lower() for col in columns)
+
+    def _matches(self, kind, value, lexeme_kind, lexeme, partial) -> bool:
+        """Whether a lexeme is (or, if partial, can still grow into) the terminal."""
+        if kind == "punct":
+            return lexeme_kind == "punct" and lexeme == value
+        if kind == "op":
+            if lexeme_kind != "op":
+                return False
+            if partial:
+                return any(op.startswith(lexeme) for op in OPERATORS)
+            return lexeme in OPERATORS
+        if kind == "num":
+            return lexeme_kind == "num"
+        if kind == "int":
+            return lexeme_kind == "num" and lexeme.isdigit()
+        if kind == "str":
+            closed = len(lexeme) > 1 and lexeme.endswith("'")
+            return lexeme_kind == "str" and (partial or closed)
+        if lexeme_kind != "word":
+            return False
+
+        word = lexeme.lower()
+        if kind == "ident":
+            return word.upper() not in KEYWORDS
+        if kind == "kw":
+            candidates = (value.lower(),)
+        elif kind == "agg":
+            candidates = tuple(agg.lower() for agg in AGGREGATES)
+        elif kind == "col":
+            candidates = self.columns
+        else:
+            candidates = (self.table,)
+        if partial:
+            return any(candidate.startswith(word) for candidate in candidates)
+        return word in candidates
+
+    def _lex(self, text: str):
+        lexemes, pos = [], 0
+        while pos < len(text):
+            match = _LEXEME_RE.match(text, pos)
+            if not match or match.end() == pos:
+                # Only trailing whitespace (or an unlexable character) is left
+                return lexemes, text[pos:].strip() == ""
+            lexemes.append((match.lastgroup, match.group(match.lastgroup)))
+            pos = match.end()
+        return lexemes, True
+
+    def analyze(self, text: str) -> tuple[bool, bool]:
+        """
+        Returns (valid_prefix, complete): whether the text can still be extended into
+        a valid statement, and whether it already is one.
+        """
+        lexemes, lexed = self._lex(text)
+        if not lexed:
+            return False, False
+
+        # The last lexeme may still be growing unless whitespace follows it
+        open_last = bool(lexemes) and not text[-1].isspace()
+
+        states = {"start"}
+        for index, (lexeme_kind, lexeme) in enumerate(lexemes):
+            partial = open_last and index == len(lexemes) - 1
+            next_states = set()
+            complete_states = set()
+            for state in states:
+                for kind, value, target in _TRANSITIONS[state]:
+                    if self._matches(kind, value, lexeme_kind, lexeme, partial):
+                        next_states.add(target)
+                        if not partial or self._matches(
+                            kind, value, lexeme_kind, lexeme, False
+                        ):
+                            complete_states.add(target)
+            if not next_states:
+                return False, False
+            # A partial lexeme completes the statement only if it is already whole
+            states = complete_states if partial else next_states
+            if partial:
+                return True, bool(states & _ACCEPTING)
+
+        return True, bool(states & _ACCEPTING)
+
+
+class SQLGrammarLogitsProcessor(LogitsProcessor):
+    """
+    Masks every next token that would take the generated text outside the grammar.
+    Only the `top_k` most likely tokens are checked (widening once if none fit), so
+    the cost per step stays small; EOS is allowed once the statement is complete.
+    Other special tokens, tokens that add no text and whitespace beyond
+    MAX_WHITESPACE_RUN are never allowed: they keep a prefix valid without
+    advancing it.
+    """
+
+    def __init__(self, tokenizer, prompt_length: int, grammar: SQLGrammar, top_k=64):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.grammar = grammar
+        self.top_k = top_k
+        self._special_ids = set(tokenizer.all_special_ids)
+
+    def _allowed_tokens(self, generated_ids: list[int], row_scores) -> list[int]:
+        text = self.tokenizer.decode(generated_ids, skip_special_tokens=True)
+        _, complete = self.grammar.analyze(text)
+
+        for k in (self.top_k, self.top_k * 16):
+            allowed = []
+            for token_id in row_scores.topk(min(k, row_scores.shape[-1])).indices:
+                token_id = int(token_id)
+                if token_id == self.tokenizer.eos_token_id:
+                    if complete:
+                        allowed.append(token_id)
+                    continue
+                if token_id in self._special_ids:
+                    continue
+                # Decode in context so word-boundary spaces are rendered correctly
+                candidate = self.tokenizer.decode(
+                    generated_ids + [token_id], skip_special_tokens=True
+                )
+                if candidate == text:
+                    continue
+                if len(candidate) - len(candidate.rstrip()) > MAX_WHITESPACE_RUN:
+                    continue
+                if self.grammar.analyze(candidate)[0]:
+                    allowed.append(token_id)
+            if allowed:
+                return allowed
+
+        # Nothing in reach keeps the statement valid; end it rather than emit garbage
+        return [self.tokenizer.eos_token_id]
+
+    def __call__(self, input_ids, scores):
+        constrained = torch.full_like(scores, float("-inf"))
+        for row, sequence in enumerate(input_ids):
+            allowed = self._allowed_tokens(
+                sequence[self.prompt_length :].tolist(), scores[row]
+            )
+            constrained[row, allowed] = scores[row, allowed]
+        return constrained
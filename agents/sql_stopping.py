@@ -0,0 +1,61 @@
+import re
+import torch
+from transformers import StoppingCriteria
+
+_SELECT_RE = re.compile(r"\bSELECT\b", re.IGNORECASE)
+
+
+def find_statement_end(text: str) -> int | None:
+    """
+    Returns the index just past the first complete SQL statement in generated text,
+    or None while the statement is still open. A statement ends at a terminating
+    ';', at a closing code fence, or right before a second SELECT.
+    """
+    first = _SELECT_RE.search(text)
+    if not first:
+        return None
+
+    ends = []
+    semicolon = text.find(";", first.end())
+    if semicolon != -1:
+        ends.append(semicolon + 1)
+
+    # Any fence after the first SELECT closes the block that statement lives in
+    fence = text.find("```", first.end())
+    if fence != -1:
+        ends.append(fence + len("```"))
+
+    second = _SELECT_RE.search(text, first.end())
+    if second:
+        ends.append(second.start())
+
+    return min(ends) if ends else None
+
+
+def truncate_sql_output(text: str) -> str:
+    """Drops anything the model generated after the first complete statement."""
+    end = find_statement_end(text)
+    return (text[:end] if end is not None else text).strip()
+
+
+class SQLStoppingCriteria(StoppingCriteria):
+    """
+    Stops decoding each sequence as soon as its generated text holds a complete
+    SQL statement, instead of spending the whole max_new_tokens budget.
+    """
+
+    def __init__(self, tokenizer, prompt_length: int):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+
+    def __call__(self, input_ids, scores, **kwargs) -> torch.BoolTensor:
+        done = [
+            find_statement_end(
+                self.tokenizer.decode(
+                    sequence[self.prompt_length :], skip_special_tokens=True
+                )
+            )
+            is not None
+            for sequence in input_ids
+        ]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
@@ -0,0 +1,66 @@
+import re
+from intent_config import PATTERN_CONFIG
+from agents.intent_generator import extract_entities, entity_spans
+from config import TABLE_NAME
+
+# Words a question may use around its entities. Any other word left once the
+# entity matches are removed (a qualifier such as "after", "excluding" or "only",
+# a second metric, an aggregate) changes the query in a way the template cannot
+# express, so the LLM handles the question instead
+_FILLER_WORDS = frozenset(
+    """
+    show display get list give fetch find see view return tell
+    can could would will please you me us i we want need like to
+    what which are is the a an all of for on in with and
+    """.split()
+)
+# Extracted filter values always carry a digit (sn1, c-6kv, 7.6); words like "for" don't
+_PLAUSIBLE_VALUE = re.compile(r"^[\w.\-]*\d[\w.\-]*$")
+
+
+def synthesize_sql(user_input: str) -> str | None:
+    """
+    Builds the SELECT directly from the entities extract_entities finds, without the LLM.
+    Returns None unless every word of the question is either part of an entity match
+    or filler, and at least one filter and one metric were extracted, so callers can
+    fall back to generation.
+    """
+    if _unexplained_words(user_input):
+        return None
+
+    entities = extract_entities(user_input)
+    metrics, filters = [], []
+    for key, config in PATTERN_CONFIG.items():
+        value = entities.get(key)
+        if config.get("is_metric", False):
+            if value:
+                metrics.append(config["column"])
+            continue
+
+        if not value:
+            continue
+        value = value.rstrip(".")  # Sentence punctuation: "for release 7.6."
+        if not _PLAUSIBLE_VALUE.match(value):
+            return None
+        # Quoted as written, so release "7.10" is not turned into 7.1
+        filters.append(f"{config['column']} = '{value}'")
+
+    if not metrics or not filters:
+        return None
+
+    return (
+        f"SELECT {', '.join(metrics)} FROM {TABLE_NAME} "
+        f"WHERE {' AND '.join(filters)};"
+    )
+
+
+def _unexplained_words(user_input: str) -> list[str]:
+    """
+    Words of the question outside every entity match that are not filler, e.g.
+    ["excluding"] or ["sn2"] (only the first value of an entity is extracted).
+    """
+    chars = list(user_input)
+    for start, end in entity_spans(user_input).values():
+        chars[start:end] = " " * (end - start)
+    words = re.findall(r"\w+", "".join(chars))
+    return [word for word in words if word.lower() not in _FILLER_WORDS]
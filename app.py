@@ -12,8 +12,16 @@ from utils import (
 )
 from agents.query_filter import is_relevant_query
 from agents.intent_generator import extract_intent
-from agents.prompt_builder import generate_sql_query
+from agents.sql_template import synthesize_sql
 from chat_history import ChatHistory
+from config import INFERENCE_SERVER_URL, TEMPLATE_FAST_PATH
+
+# With an inference server configured, this process never imports torch or the model
+if INFERENCE_SERVER_URL:
+    from inference_client import call_inference_service
+else:
+    from agents.prompt_builder import stream_sql_query
+    from model_loader import warmup_model
 from utils import show_chart_from_cache
 
 logger = log_function("app")
@@ -22,8 +30,27 @@ if "chat_history" not in st.session_state:
     st.session_state.chat_history = ChatHistory()
 
 
+def _generate_sql(user_input: str, schema_hint: str) -> str:
+    """Generates SQL via the inference server if configured, otherwise in-process."""
+    if INFERENCE_SERVER_URL:
+        return call_inference_service(user_input)
+
+    # Show the SQL progressively while the model is still decoding
+    sql_placeholder = st.empty()
+    raw_sql = ""
+    for raw_sql in stream_sql_query(user_input, schema_hint):
+        sql_placeholder.code(raw_sql, language="sql")
+    sql_placeholder.empty()
+    return raw_sql
+
+
 def main():
     setup_page()
+    if not INFERENCE_SERVER_URL and "model_ready" not in st.session_state:
+        # The registry loads once per process; later sessions return immediately
+        with st.spinner("Loading model..."):
+            warmup_model()
+        st.session_state.model_ready = True
     schema_hint = get_schema_hint()
     user_input, submit = display_ui_and_get_input()
 
@@ -48,12 +75,22 @@ def main():
                     st.session_state.intent = intent
                     st.session_state.sql_query = sql_query
                     st.session_state.from_cache = True
-                    chat_history.add_question_answer(user_input, sql_query)
+                    st.session_state.sql_source = "cache"
                 else:
-                    raw_sql = generate_sql_query(user_input, schema_hint)
-                    sql_query = (
-                        extract_command_from_code_block(raw_sql) or raw_sql.strip()
+                    # Fully extracted intents are answered from a template, no LLM call
+                    template_sql = (
+                        synthesize_sql(user_input) if TEMPLATE_FAST_PATH else None
                     )
+                    if template_sql:
+                        sql_query = template_sql
+                        st.session_state.sql_source = "template"
+                    else:
+                        raw_sql = _generate_sql(user_input, schema_hint)
+                        sql_query = (
+                            extract_command_from_code_block(raw_sql) or raw_sql.strip()
+                        )
+                        st.session_state.sql_source = "llm"
+                    logger.info(f"SQL served by {st.session_state.sql_source} path")
                     intent = extract_intent(user_input)
                     st.session_state.intent = intent
                     st.session_state.sql_query = sql_query
@@ -76,6 +113,8 @@ def main():
         st.code(st.session_state.sql_query, language="sql")
         if st.session_state.get("from_cache"):
             st.info("Using cached SQL query from previous interaction.")
+        elif st.session_state.get("sql_source") == "template":
+            st.info("Built SQL directly from the detected entities (no LLM call).")
 
         if "duration" in st.session_state:
             st.info("Executing SQL queries via MCP Server…")
@@ -0,0 +1,36 @@
+"""Shared helpers for the benchmark scripts; run them from the repository root."""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SAMPLE_QUESTIONS_PATH = os.path.join(ROOT, "sample_questions.txt")
+
+
+def load_sample_questions(path=SAMPLE_QUESTIONS_PATH) -> list[str]:
+    """Returns the non-empty lines of sample_questions.txt."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def timed(fn, *args, **kwargs):
+    """Runs fn and returns (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def print_table(headers: list[str], rows: list[list]):
+    """Prints rows as a simple fixed-width table."""
+    widths = [
+        max(len(str(h)), *(len(str(r[i])) for r in rows)) if rows else len(str(h))
+        for i, h in enumerate(headers)
+    ]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
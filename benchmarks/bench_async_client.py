@@ -0,0 +1,113 @@
+"""
+Sequential, batched and concurrent MCP calls against a stand-in server.
+
+A stdlib HTTP server mimics the MCP query endpoints and sleeps --latency seconds
+per request, standing in for network and query time. For each round the app's
+two queries (user and visualization) are fetched three ways: two blocking calls
+back to back, one batch request, and two concurrent requests on the async client
+through its sync wrapper. Concurrent rounds should cost about one latency.
+
+    python benchmarks/bench_async_client.py [--latency 0.05] [--rounds 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from _common import print_table
+
+COLUMNS = ["test_suite", "platform", "passed"]
+ROWS = [["smoke", "c-8kv", 10], ["regression", "c-8kv", 42]]
+
+
+def make_handler(latency: float):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like uvicorn
+        disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.genbi.columnar+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _result(self):
+            data = {col: [row[i] for row in ROWS] for i, col in enumerate(COLUMNS)}
+            return {"status": "success", "data": data, "columns": COLUMNS}
+
+        def do_GET(self):
+            time.sleep(latency)
+            self._reply([{"name": "execute_select_sql_query"}])
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            if self.path == "/execute_select_sql_queries":
+                self._reply({"results": [self._result() for _ in request["sql_queries"]]})
+            else:
+                self._reply(self._result())
+
+    return StandInHandler
+
+
+def start_stand_in(latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_stand_in(args.latency)
+    # config reads the server URL at import time; .env does not override it
+    os.environ["MCP_SERVER_URL"] = f"http://127.0.0.1:{server.server_port}"
+    import mcp_client
+
+    queries = [
+        "SELECT * FROM test_results WHERE platform = 'c-8kv'",
+        "SELECT SUM(passed) FROM test_results WHERE platform = 'c-8kv'",
+    ]
+    modes = [
+        ("sequential", lambda: [mcp_client.call_mcp_sql_dataframe(q) for q in queries]),
+        ("batch", lambda: mcp_client.call_mcp_sql_executor_batch(queries)),
+        ("concurrent", lambda: mcp_client.call_mcp_sql_dataframes(queries)),
+    ]
+
+    rows = []
+    for label, fetch in modes:
+        fetch()  # Warm-up: opens the pooled connections
+        latencies = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            fetch()
+            latencies.append((time.perf_counter() - start) * 1000)
+        rows.append(
+            [
+                label,
+                f"{statistics.mean(latencies):.1f}",
+                f"{max(latencies):.1f}",
+                f"{statistics.mean(latencies) / (args.latency * 1000):.2f}",
+            ]
+        )
+
+    print(f"Stand-in latency: {args.latency * 1000:.0f} ms per request\n")
+    print_table(["mode", "mean ms", "max ms", "x latency"], rows)
+    mcp_client.close_http_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
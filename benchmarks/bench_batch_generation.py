@@ -0,0 +1,47 @@
+"""
+Throughput of generate_sql_queries against calling generate_sql_query in a loop
+over sample_questions.txt.
+
+    python benchmarks/bench_batch_generation.py [--batch-sizes 1,4,8,16]
+"""
+
+import argparse
+
+from _common import load_sample_questions, timed, print_table
+
+from agents.prompt_builder import generate_sql_query, generate_sql_queries
+from model_loader import load_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", default="4,8,16")
+    args = parser.parse_args()
+
+    questions = load_sample_questions()
+    load_model()
+
+    loop_sqls, loop_elapsed = timed(
+        lambda: [generate_sql_query(question, "") for question in questions]
+    )
+    rows = [["loop (current)", 1, f"{len(questions) / loop_elapsed:.2f}", "-"]]
+
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        batch_sqls, elapsed = timed(
+            generate_sql_queries, questions, "", batch_size=batch_size
+        )
+        agreement = sum(a == b for a, b in zip(loop_sqls, batch_sqls))
+        rows.append(
+            [
+                "batched",
+                batch_size,
+                f"{len(questions) / elapsed:.2f}",
+                f"{agreement}/{len(questions)}",
+            ]
+        )
+
+    print_table(["mode", "batch size", "questions/sec", "same SQL as loop"], rows)
+
+
+if __name__ == "__main__":
+    main()
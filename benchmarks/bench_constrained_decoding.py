@@ -0,0 +1,58 @@
+"""
+Speed and validity of free vs grammar-constrained SQL generation over
+sample_questions.txt. A query counts as valid when it runs against the
+test_results table loaded from the CSV.
+
+    python benchmarks/bench_constrained_decoding.py
+"""
+
+import sqlite3
+import statistics
+
+from _common import load_sample_questions, timed, print_table
+
+from agents.prompt_builder import generate_sql_query
+from config import CSV_PATH, TABLE_NAME, DB_PATH
+from db_loader import load_csv_to_sqlite
+from model_loader import load_model
+from utils import extract_command_from_code_block
+
+
+def is_valid(conn: sqlite3.Connection, raw_sql: str) -> bool:
+    sql = extract_command_from_code_block(raw_sql) or raw_sql.strip()
+    try:
+        conn.execute(sql).fetchall()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def main():
+    questions = load_sample_questions()
+    conn, _ = load_csv_to_sqlite(CSV_PATH, TABLE_NAME, DB_PATH)
+    load_model()
+
+    rows = []
+    for label, constrained in (("free", False), ("constrained", True)):
+        latencies, valid = [], 0
+        for question in questions:
+            raw_sql, elapsed = timed(
+                generate_sql_query, question, "", constrained=constrained
+            )
+            latencies.append(elapsed)
+            valid += is_valid(conn, raw_sql)
+        rows.append(
+            [
+                label,
+                f"{statistics.mean(latencies) * 1000:.0f}",
+                f"{statistics.median(latencies) * 1000:.0f}",
+                f"{valid}/{len(questions)} ({valid / len(questions):.0%})",
+            ]
+        )
+    conn.close()
+
+    print_table(["mode", "mean ms", "p50 ms", "valid SQL"], rows)
+
+
+if __name__ == "__main__":
+    main()
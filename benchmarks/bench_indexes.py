@@ -0,0 +1,111 @@
+"""
+Checks that the filters generated SQL uses are served by the test_results
+indexes (EXPLAIN QUERY PLAN must show an index SEARCH, never a full SCAN),
+then times those queries with and without the indexes as the table grows.
+
+    python benchmarks/bench_indexes.py [--max-exponent 6] [--repeat 20]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from _common import timed, print_table
+from bench_ingest import write_synthetic_csv
+
+from agents.query_executor import explain_query_plan
+from db_loader import load_csv_to_sqlite
+
+QUERIES = {
+    "platform": "SELECT testcases_passed FROM test_results WHERE platform = 'c-6kv'",
+    "suite": "SELECT testcases_executed FROM test_results WHERE test_suite = 'sn1'",
+    "suite+platform": (
+        "SELECT testcases_passed FROM test_results "
+        "WHERE test_suite = 'sn1' AND platform = 'c-6kv'"
+    ),
+    "platform+version": (
+        "SELECT testcases_passed FROM test_results "
+        "WHERE platform = 'c-6kv' AND release_version = 7.6"
+    ),
+    "all three": (
+        "SELECT testcases_executed FROM test_results "
+        "WHERE test_suite = 'sn3' AND platform = 'c-8kv' AND release_version = 7.6"
+    ),
+}
+
+
+def check_query_plans(conn: sqlite3.Connection):
+    """Raises AssertionError if any benchmark query falls back to a full table scan."""
+    for label, sql in QUERIES.items():
+        plan = explain_query_plan(conn, sql)
+        assert any("USING" in line and "INDEX" in line for line in plan), (label, plan)
+        assert not any(line.startswith("SCAN") for line in plan), (label, plan)
+
+
+def time_queries(conn: sqlite3.Connection, repeat: int) -> dict[str, float]:
+    """Mean milliseconds per query execution."""
+    results = {}
+    for label, sql in QUERIES.items():
+        _, elapsed = timed(
+            lambda: [conn.execute(sql).fetchall() for _ in range(repeat)]
+        )
+        results[label] = elapsed / repeat * 1000
+    return results
+
+
+def drop_indexes(conn: sqlite3.Connection):
+    names = [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'test_results' AND sql IS NOT NULL"
+        )
+    ]
+    for name in names:
+        conn.execute(f"DROP INDEX {name}")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-exponent", type=int, default=3)
+    parser.add_argument("--max-exponent", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="genbi_indexes_")
+    rows = []
+    try:
+        for exponent in range(args.min_exponent, args.max_exponent + 1):
+            csv_path = os.path.join(workdir, f"results_1e{exponent}.csv")
+            db_path = os.path.join(workdir, f"results_1e{exponent}.db")
+            write_synthetic_csv(csv_path, 10**exponent)
+
+            conn, _ = load_csv_to_sqlite(csv_path, "test_results", db_path)
+            check_query_plans(conn)
+            indexed = time_queries(conn, args.repeat)
+            drop_indexes(conn)
+            scanned = time_queries(conn, args.repeat)
+            conn.close()
+
+            for label in QUERIES:
+                rows.append(
+                    [
+                        f"1e{exponent}",
+                        label,
+                        f"{scanned[label]:.3f}",
+                        f"{indexed[label]:.3f}",
+                        f"{scanned[label] / indexed[label]:.1f}x",
+                    ]
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("EXPLAIN QUERY PLAN check passed: every query is served by an index.")
+    print_table(["rows", "filter", "scan ms", "indexed ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
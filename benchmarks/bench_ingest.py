@@ -0,0 +1,122 @@
+"""
+Rows/sec and peak RSS of the chunked CSV ingest on synthetic result dumps.
+Each size is generated into a temporary directory and loaded in its own
+subprocess, so peak RSS reflects that load alone. Peak RSS should stay flat
+as the row count grows: the growth column compares each size with the previous one.
+
+    python benchmarks/bench_ingest.py [--max-exponent 8] [--keep]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from _common import timed, print_table
+
+HEADER = [
+    "Platform",
+    "Test_Suite",
+    "Testcases Passed",
+    "Testcases Executed",
+    "Testcases Failed",
+    "Release_Version",
+]
+PLATFORMS = ["c-8kv", "c-7kv", "c-6kv", "c-5kv", "c-4kv"]
+SUITES = ["sn1", "sn2", "sn3"]
+VERSIONS = ["7.6", "7.5", "7.2", "7.1"]
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int = 0):
+    """Writes a CSV shaped like raw_data_poc.csv with `rows` random rows."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for _ in range(rows):
+            executed = rng.randint(50, 100)
+            passed = rng.randint(0, executed)
+            writer.writerow(
+                [
+                    rng.choice(PLATFORMS),
+                    rng.choice(SUITES),
+                    passed,
+                    executed,
+                    executed - passed,
+                    rng.choice(VERSIONS),
+                ]
+            )
+
+
+def run_load(csv_path: str, db_path: str):
+    """Loads the CSV and prints one JSON report line."""
+    from db_loader import load_csv_to_sqlite
+
+    (conn, _), elapsed = timed(load_csv_to_sqlite, csv_path, "test_results", db_path)
+    rows = conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0]
+    conn.close()
+    # ru_maxrss is reported in KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"rows": rows, "seconds": elapsed, "peak_rss_mb": peak_rss_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-exponent", type=int, default=4)
+    parser.add_argument("--max-exponent", type=int, default=6)
+    parser.add_argument("--keep", action="store_true", help="keep generated files")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_load(*args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="genbi_ingest_")
+    rows = []
+    try:
+        for exponent in range(args.min_exponent, args.max_exponent + 1):
+            row_count = 10**exponent
+            csv_path = os.path.join(workdir, f"results_1e{exponent}.csv")
+            db_path = os.path.join(workdir, f"results_1e{exponent}.db")
+            write_synthetic_csv(csv_path, row_count)
+
+            completed = subprocess.run(
+                [sys.executable, __file__, "--child", csv_path, db_path],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            report = json.loads(completed.stdout.strip().splitlines()[-1])
+            rows.append(
+                [
+                    f"1e{exponent}",
+                    f"{os.path.getsize(csv_path) / 2**20:.1f}",
+                    f"{report['seconds']:.2f}",
+                    f"{report['rows'] / report['seconds']:,.0f}",
+                    f"{report['peak_rss_mb']:.0f}",
+                    # Growth over the previous size: near zero once the SQLite page
+                    # cache and the pandas chunk are full-sized
+                    f"{report['peak_rss_mb'] - float(rows[-1][4]):+.0f}" if rows else "",
+                ]
+            )
+            if not args.keep:
+                os.remove(csv_path)
+                os.remove(db_path)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(
+        ["rows", "csv MB", "seconds", "rows/sec", "peak rss MB", "rss growth MB"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Latency, resident memory and SQL agreement of each CPU precision mode over
+sample_questions.txt. Each mode runs in its own subprocess so peak RSS is
+measured in isolation; agreement is exact match against the fp32 SQL.
+
+    python benchmarks/bench_precision.py [--modes fp32,bf16,int8]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+
+from _common import load_sample_questions, timed, print_table
+
+
+def run_mode(precision: str):
+    """Generates SQL for every sample question and prints one JSON report line."""
+    from agents.prompt_builder import generate_sql_query
+    from model_loader import load_model
+
+    _, load_seconds = timed(load_model, precision=precision)
+
+    sqls, latencies = [], []
+    for question in load_sample_questions():
+        sql, elapsed = timed(generate_sql_query, question, "")
+        sqls.append(sql)
+        latencies.append(elapsed)
+
+    # ru_maxrss is reported in KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        json.dumps(
+            {
+                "precision": precision,
+                "load_seconds": load_seconds,
+                "latencies": latencies,
+                "peak_rss_mb": peak_rss_mb,
+                "sqls": sqls,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", default="fp32,bf16,int8")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child)
+        return
+
+    reports = {}
+    for precision in args.modes.split(","):
+        completed = subprocess.run(
+            [sys.executable, __file__, "--child", precision],
+            # generate_sql_query loads with the configured precision
+            env={**os.environ, "MODEL_PRECISION": precision},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        reports[precision] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    baseline = reports.get("fp32")
+    rows = []
+    for precision, report in reports.items():
+        latencies = report["latencies"]
+        agreement = (
+            f"{sum(a == b for a, b in zip(report['sqls'], baseline['sqls']))}"
+            f"/{len(latencies)}"
+            if baseline
+            else "-"
+        )
+        rows.append(
+            [
+                precision,
+                f"{report['load_seconds']:.1f}",
+                f"{statistics.mean(latencies) * 1000:.0f}",
+                f"{statistics.median(latencies) * 1000:.0f}",
+                f"{report['peak_rss_mb']:.0f}",
+                agreement,
+            ]
+        )
+
+    print_table(
+        ["mode", "load s", "mean ms", "p50 ms", "peak rss MB", "exact match vs fp32"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Time-to-first-token for generate_sql_query with and without the reused
+system prompt KV cache.
+
+    python benchmarks/bench_prompt_cache.py [--repeat N]
+"""
+
+import argparse
+import statistics
+
+from _common import load_sample_questions, timed, print_table
+
+from agents import prompt_builder
+from agents.prompts import get_system_prompt
+from model_loader import load_model, get_prompt_cache
+
+
+def measure_ttft(questions: list[str], use_prompt_cache: bool, repeat: int):
+    """Returns per-call latencies of a single-token generation."""
+    latencies = []
+    for _ in range(repeat):
+        for question in questions:
+            _, elapsed = timed(
+                prompt_builder.generate_sql_query,
+                question,
+                "",
+                use_prompt_cache=use_prompt_cache,
+            )
+            latencies.append(elapsed)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    questions = load_sample_questions()
+    tokenizer, model = load_model()
+
+    # The one-off prefill is paid on the first request after a model load
+    _, warmup = timed(get_prompt_cache, tokenizer, model, get_system_prompt())
+
+    # A single decode step makes generate() latency equal to time-to-first-token
+    prompt_builder.MAX_NEW_TOKENS = 1
+
+    rows = []
+    for label, use_cache in (("full prefill", False), ("prompt cache", True)):
+        latencies = measure_ttft(questions, use_cache, args.repeat)
+        rows.append(
+            [
+                label,
+                len(latencies),
+                f"{statistics.mean(latencies) * 1000:.1f}",
+                f"{statistics.median(latencies) * 1000:.1f}",
+                f"{max(latencies) * 1000:.1f}",
+            ]
+        )
+
+    print(f"One-off system prompt prefill: {warmup * 1000:.1f} ms")
+    print_table(["mode", "calls", "mean ttft ms", "p50 ttft ms", "max ttft ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Payload size, server serialization time and client decode time (into a pandas
+DataFrame) for each result encoding of /execute_select_sql_query, on synthetic
+test_results rows. "rows" is the original list-of-dicts JSON layout; Arrow is
+skipped when pyarrow is not installed.
+
+    python benchmarks/bench_result_encoding.py [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import random
+
+from _common import timed, print_table
+from result_encoding import (
+    ROWS_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE,
+    ARROW_MEDIA_TYPE,
+    decode_dataframe,
+    encode_result,
+    supported_media_types,
+)
+
+COLUMNS = [
+    "platform",
+    "test_suite",
+    "testcases_passed",
+    "testcases_executed",
+    "testcases_failed",
+    "version",
+]
+LABELS = {
+    ROWS_MEDIA_TYPE: "rows",
+    COLUMNAR_MEDIA_TYPE: "columnar",
+    ARROW_MEDIA_TYPE: "arrow",
+}
+
+
+def synthetic_rows(count: int, seed: int = 0) -> list[tuple]:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        executed = rng.randint(50, 100)
+        passed = rng.randint(0, executed)
+        rows.append(
+            (
+                rng.choice(["c-8kv", "c-7kv", "c-6kv", "c-5kv"]),
+                rng.choice(["sn1", "sn2", "sn3"]),
+                passed,
+                executed,
+                executed - passed,
+                rng.choice(["7.6", "7.5", "7.2"]),
+            )
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 100000, 1000000]
+    )
+    args = parser.parse_args()
+
+    meta = {"status": "success", "truncated": False, "next_page_token": None}
+    table = []
+    for size in args.sizes:
+        rows = synthetic_rows(size)
+        baseline_bytes = None
+        for media_type in supported_media_types():
+            body, encode_seconds = timed(encode_result, media_type, rows, COLUMNS, meta)
+            df, decode_seconds = timed(decode_dataframe, media_type, body)
+            assert len(df) == size and list(df.columns) == COLUMNS
+            if media_type == ROWS_MEDIA_TYPE:
+                baseline_bytes = len(body)
+            table.append(
+                [
+                    size,
+                    LABELS[media_type],
+                    f"{len(body) / 1e6:.2f}",
+                    f"{len(body) / baseline_bytes:.2f}x",
+                    f"{encode_seconds * 1000:.1f}",
+                    f"{decode_seconds * 1000:.1f}",
+                ]
+            )
+
+    print_table(
+        ["rows", "encoding", "MB", "vs rows", "encode ms", "decode ms"], table
+    )
+
+
+if __name__ == "__main__":
+    main()
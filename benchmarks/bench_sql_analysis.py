@@ -0,0 +1,161 @@
+"""
+Parse-once SQL analysis: a corpus check and a microbenchmark.
+
+The corpus is the SQL produced for every question in sample_questions.txt (by the
+template fast path, and by the model too with --llm). Each statement must parse as
+a simple SELECT on the configured table, keep the metric the legacy regex found,
+and yield a visualization rewrite that SQLite accepts. The microbenchmark times
+the four legacy regex passes against one uncached and one cached analysis.
+
+    python benchmarks/bench_sql_analysis.py [--llm] [--repeat 200] [--verbose]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+
+from _common import load_sample_questions, timed, print_table
+
+from agents.sql_analysis import SQLAnalysis, analyze_sql
+from agents.sql_template import synthesize_sql
+from config import COLUMN_TYPES, DB_PATH, TABLE_NAME
+
+
+# --- The regex passes the analysis replaced, kept here as the baseline --- #
+
+
+def legacy_visualization_sql(sql_query):
+    from_index = sql_query.lower().find("from")
+    return sql_query if from_index == -1 else f"SELECT * {sql_query[from_index:]}"
+
+
+def legacy_metric(sql_query):
+    match = re.search(
+        r"SELECT\s+(?:(SUM|COUNT|AVG|MIN|MAX)\s*\(\s*(\w+)\s*\)|(\w+))\s+FROM",
+        sql_query,
+        re.IGNORECASE,
+    )
+    return (match.group(2) or match.group(3)) if match else None
+
+
+def legacy_selected_columns(sql):
+    match = re.search(r"SELECT\s+(.*?)\s+FROM", sql, re.IGNORECASE | re.DOTALL)
+    if not match or match.group(1).strip() == "*":
+        return []
+    columns = []
+    for part in match.group(1).split(","):
+        col = part.strip()
+        if " as " in col.lower():
+            col = col.split(" as ")[0].strip()
+        func_match = re.match(r"(sum|count|avg|min|max)\((.*?)\)", col, re.IGNORECASE)
+        columns.append(func_match.group(2).strip() if func_match else col)
+    return columns
+
+
+def legacy_conditions(sql_query):
+    where_index = sql_query.lower().find("where")
+    return sql_query[where_index + 5 :].strip() if where_index != -1 else "No conditions"
+
+
+def legacy_passes(sql):
+    re.match(r"^\s*SELECT", sql, re.IGNORECASE)
+    return (
+        legacy_visualization_sql(sql),
+        legacy_metric(sql),
+        legacy_selected_columns(sql),
+        legacy_conditions(sql),
+    )
+
+
+def analysis_passes(analysis):
+    return (
+        analysis.is_select,
+        analysis.visualization_sql(),
+        analysis.metric_column,
+        analysis.selected_columns,
+        analysis.conditions,
+    )
+
+
+# --- Corpus --- #
+
+
+def build_corpus(questions: list[str], use_llm: bool) -> list[tuple[str, str]]:
+    corpus = [(q, sql) for q in questions if (sql := synthesize_sql(q))]
+    if use_llm:
+        from agents.prompt_builder import generate_sql_queries
+        from utils import extract_command_from_code_block
+
+        for question, raw_sql in zip(questions, generate_sql_queries(questions)):
+            sql = extract_command_from_code_block(raw_sql) or raw_sql.strip()
+            corpus.append((question, sql))
+    return corpus
+
+
+def schema_connection() -> sqlite3.Connection:
+    """The real database if it exists, else an empty table with the known columns."""
+    if os.path.exists(DB_PATH):
+        return sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    conn = sqlite3.connect(":memory:")
+    columns = ", ".join(f'"{name}" {sql_type}' for name, sql_type in COLUMN_TYPES.items())
+    conn.execute(f"CREATE TABLE {TABLE_NAME} ({columns})")
+    return conn
+
+
+def check(sql: str, conn: sqlite3.Connection) -> list[str]:
+    analysis = analyze_sql(sql)
+    problems = []
+    if not analysis.simple:
+        problems.append("not parsed as a simple SELECT")
+        return problems
+    if (analysis.table or "").lower() != TABLE_NAME.lower():
+        problems.append(f"table {analysis.table!r}")
+    legacy = legacy_metric(sql)
+    if legacy and analysis.metric_column != legacy:
+        problems.append(f"metric {analysis.metric_column!r} != legacy {legacy!r}")
+    try:
+        conn.execute(f"EXPLAIN {analysis.visualization_sql()}")
+    except sqlite3.Error as e:
+        problems.append(f"visualization SQL rejected: {e}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--llm", action="store_true", help="also check model output")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    corpus = build_corpus(load_sample_questions(), args.llm)
+    conn = schema_connection()
+    failures = 0
+    for question, sql in corpus:
+        problems = check(sql, conn)
+        failures += bool(problems)
+        if problems or args.verbose:
+            print(f"[{'FAIL' if problems else 'ok'}] {question}\n    {sql}")
+            for problem in problems:
+                print(f"    - {problem}")
+    print(f"Corpus: {len(corpus) - failures}/{len(corpus)} statements passed.\n")
+
+    statements = [sql for _, sql in corpus]
+    runs = [
+        ("legacy regex passes", lambda: [legacy_passes(s) for s in statements]),
+        ("analysis, uncached", lambda: [analysis_passes(SQLAnalysis(s)) for s in statements]),
+        ("analysis, cached", lambda: [analysis_passes(analyze_sql(s)) for s in statements]),
+    ]
+    rows = []
+    for label, run in runs:
+        _, elapsed = timed(lambda: [run() for _ in range(args.repeat)])
+        per_query_us = elapsed / (args.repeat * max(1, len(statements))) * 1e6
+        rows.append([label, f"{per_query_us:.1f}"])
+    print_table(["stages", "us per query"], rows)
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Hit rate and latency of the template SQL fast path over sample_questions.txt.
+Questions it declines fall back to the LLM in app.main.
+
+    python benchmarks/bench_template_fast_path.py [--verbose]
+"""
+
+import argparse
+
+from _common import load_sample_questions, timed, print_table
+
+from agents.sql_template import synthesize_sql
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true", help="print every SQL")
+    args = parser.parse_args()
+
+    questions = load_sample_questions()
+    results = [timed(synthesize_sql, question) for question in questions]
+    hits = [sql for sql, _ in results if sql]
+    total_ms = sum(elapsed for _, elapsed in results) * 1000
+
+    if args.verbose:
+        for question, (sql, _) in zip(questions, results):
+            print(f"[{'template' if sql else 'llm'}] {question}\n    {sql or '-'}")
+        print()
+
+    print_table(
+        ["questions", "template hits", "hit rate", "mean synth ms"],
+        [
+            [
+                len(questions),
+                len(hits),
+                f"{len(hits) / len(questions):.0%}",
+                f"{total_ms / len(questions):.3f}",
+            ]
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
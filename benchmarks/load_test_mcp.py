@@ -0,0 +1,147 @@
+"""
+Load test for the MCP server's /execute_select_sql_query endpoint.
+Starts the server in a subprocess, then drives it with 1..16 concurrent clients
+and reports throughput, latency percentiles, 503 rejections and the latency of
+a lightweight GET probe issued meanwhile (which stays low only if SQLite work
+is kept off the event loop). Every request is made distinct so it misses the
+server's result cache and reaches the pool and executor; --cached sends the SQL
+unchanged instead, to measure cache hits.
+
+    python benchmarks/load_test_mcp.py [--duration 5] [--port 8765] [--sql "..."] [--cached]
+"""
+
+import argparse
+import itertools
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from _common import ROOT, print_table
+
+DEFAULT_SQL = "SELECT * FROM test_results WHERE platform = 'c-8kv'"
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16)
+_request_ids = itertools.count()
+
+
+def uncached_variant(sql: str) -> str:
+    """The same rows under a query text (and so a cache key) no request has used."""
+    return f"SELECT *, {next(_request_ids)} AS load_test_request FROM ({sql}\n)"
+
+
+def start_server(port: int) -> subprocess.Popen:
+    """Starts mcp_server under uvicorn and waits until it answers /tools."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "mcp_server:app", "--port", str(port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/tools", timeout=1)
+            return process
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("MCP server did not start within 60 seconds.")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_level(
+    base_url: str, sql: str, concurrency: int, duration: float, cached: bool
+) -> list:
+    """Runs `concurrency` client threads for `duration` seconds."""
+    latencies, probe_latencies = [], []
+    counts = {"ok": 0, "busy": 0, "error": 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            query = sql if cached else uncached_variant(sql)
+            start = time.perf_counter()
+            response = session.post(
+                f"{base_url}/execute_select_sql_query", json={"sql_query": query}
+            )
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    counts["ok"] += 1
+                    latencies.append(elapsed)
+                elif response.status_code == 503:
+                    counts["busy"] += 1
+                else:
+                    counts["error"] += 1
+
+    def probe():
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            session.get(f"{base_url}/metrics/executor")
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    threads.append(threading.Thread(target=probe))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return [
+        concurrency,
+        f"{counts['ok'] / duration:.1f}",
+        f"{percentile(latencies, 0.5) * 1000:.1f}",
+        f"{percentile(latencies, 0.95) * 1000:.1f}",
+        f"{percentile(latencies, 0.99) * 1000:.1f}",
+        counts["busy"],
+        counts["error"],
+        f"{statistics.median(probe_latencies) * 1000:.1f}" if probe_latencies else "-",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sql", default=DEFAULT_SQL)
+    parser.add_argument(
+        "--cached", action="store_true", help="repeat the SQL verbatim (cache hits)"
+    )
+    args = parser.parse_args()
+
+    process = start_server(args.port)
+    try:
+        base_url = f"http://127.0.0.1:{args.port}"
+        rows = [
+            run_level(base_url, args.sql, level, args.duration, args.cached)
+            for level in CONCURRENCY_LEVELS
+        ]
+        print_table(
+            [
+                "clients", "req/s", "p50 ms", "p95 ms", "p99 ms",
+                "503s", "errors", "probe p50 ms",
+            ],
+            rows,
+        )
+        print(requests.get(f"{base_url}/metrics/executor").json())
+        print(requests.get(f"{base_url}/metrics/result_cache").json())
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,66 @@
 import logging
 from collections import deque
+from config import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    MODEL_NAME,
+    INFERENCE_SERVER_URL,
+)
+from agents.prompts import prompt_version
+from sql_cache import get_shared_sql_cache
 
 # Initialize logger for chat_history.py
 logger = logging.getLogger("chat_history")
 logger.setLevel(logging.INFO)
 
 class ChatHistory:
-    def __init__(self, max_size=15):
-        # Using deque to store up to `max_size` items
+    def __init__(self, max_size=15, semantic=SEMANTIC_CACHE_ENABLED, sql_cache=None):
+        # Using deque to keep this session's latest `max_size` questions
         self.history = deque(maxlen=max_size)
+        # Lookups go to the persistent cache shared by every session
+        self.sql_cache = sql_cache or get_shared_sql_cache()
+        self.semantic_cache = None
+        if semantic:
+            from semantic_cache import SemanticQuestionCache, encode_questions
+
+            # With an inference server the encoder lives there, keeping torch out of
+            # this process; otherwise it is loaded on the first lookup
+            if INFERENCE_SERVER_URL:
+                from inference_client import call_embedding_service as encode
+            else:
+                encode = encode_questions
+            self.semantic_cache = SemanticQuestionCache(
+                max_size, SEMANTIC_CACHE_THRESHOLD, encode=encode
+            )
         logger.info("Chat history initialized with a maximum size of %d.", max_size)
 
     def get_sql_for_question(self, question):
         """Check if the question already exists in the history and return the SQL if found."""
         logger.info("Checking chat history for question: %s", question)
-        for q, sql in self.history:
-            logger.debug("Comparing with stored question: %s", q)
-            if q.strip().lower() == question.strip().lower():  # Normalize for comparison
-                logger.info("Found cached SQL for question: %s", question)
-                return sql
+        sql = self.sql_cache.get(question, MODEL_NAME, prompt_version())
+        if sql:
+            logger.info("Found cached SQL for question: %s", question)
+            return sql
+
+        # Fall back to a paraphrase with exactly the same entities
+        if self.semantic_cache:
+            try:
+                sql = self.semantic_cache.get_sql_for_question(question)
+                if sql:
+                    logger.info("Found semantically cached SQL for question: %s", question)
+                    return sql
+            except Exception as e:
+                logger.warning("Semantic cache lookup failed: %s", e)
         logger.info("No cached SQL found for question: %s", question)
         return None
 
     def add_question_answer(self, question, sql):
         """Add a new question and its corresponding SQL query to the history."""
         self.history.append((question, sql))
-        logger.info("Added question to history: %s", question)
\ No newline at end of file
+        self.sql_cache.put(question, sql, MODEL_NAME, prompt_version())
+        if self.semantic_cache:
+            try:
+                self.semantic_cache.add_question_answer(question, sql)
+            except Exception as e:
+                logger.warning("Could not add question to semantic cache: %s", e)
+        logger.info("Added question to history: %s", question)
@@ -13,8 +13,91 @@ MODEL_NAME = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
 # MODEL_NAME = "mrm8488/t5-base-finetuned-wikiSQL"
 # MODEL_NAME = "microsoft/phi-2"
 # MODEL_NAME = "Qwen/Qwen2.5-3B"
+# CPU inference precision: "fp32", "bf16" or "int8" (dynamic quantization of Linear layers)
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+# Number of models the process-wide registry keeps in memory at once
+MAX_RESIDENT_MODELS = int(os.getenv("MAX_RESIDENT_MODELS", "1"))
+# Optional local inference service; when set, app.py sends questions there instead
+# of loading the model in the Streamlit process
+INFERENCE_SERVER_URL = os.getenv("INFERENCE_SERVER_URL")
+INFERENCE_MAX_BATCH_SIZE = 8  # Most questions coalesced into one generate call
+INFERENCE_MAX_WAIT_MS = 20  # How long the first queued question waits for company
+INFERENCE_REQUEST_TIMEOUT = 60  # Default per-request deadline in seconds
+# Reuse SQL for paraphrased questions with identical entities (sentence-transformers)
+SEMANTIC_CACHE_ENABLED = True
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_CACHE_THRESHOLD = 0.9  # Minimum cosine similarity for a cache hit
+# Cross-session SQL cache shared by every Streamlit session and restart
+SQL_CACHE_PATH = "sql_cache.db"
+SQL_CACHE_MAX_ENTRIES = 10000  # Least recently used entries are evicted beyond this
+SQL_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Entries older than this are treated as misses
+SQL_CACHE_PURGE_INTERVAL_SECONDS = 3600  # How often expired entries are deleted in bulk
 DB_PATH = "test_results.db"  # Changed to a file-based database
+# Read-only connection pool used by the MCP server
+DB_POOL_SIZE = 8  # Most connections open (and queries running) at once
+DB_POOL_TIMEOUT = 5  # Seconds to wait for a free connection before failing
+DB_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the database file memory-mapped per connection
+DB_CACHE_SIZE_KB = 16384  # Page cache per connection
+DB_STATEMENT_CACHE_SIZE = 128  # Prepared statements cached per connection
+QUERY_CONCURRENCY = DB_POOL_SIZE  # Queries the MCP server executes in parallel
+QUERY_QUEUE_LIMIT = 32  # Queries allowed to wait before new ones get a 503
+QUERY_RETRY_AFTER_SECONDS = 1  # Retry-After sent with a 503 when the queue is full
+MAX_RESULT_ROWS = 100000  # Rows returned by one response; larger results are truncated
+STREAM_FETCH_SIZE = 1000  # Rows fetched (and flushed) per batch when streaming
+DEFAULT_PAGE_SIZE = 1000  # Rows per page when a client asks for pagination
+MAX_PAGE_SIZE = 10000  # Largest page size a client may request
+MAX_BATCH_QUERIES = 8  # SELECTs accepted by one /execute_select_sql_queries call
+# Guardrails for generated SQL executed by the MCP server
+QUERY_GUARD_ENABLED = True
+QUERY_MAX_PLAN_COST = 50_000_000  # Estimated rows visited above which a plan is rejected
+QUERY_MAX_VM_STEPS = 500_000_000  # SQLite VM instructions one query may execute
+QUERY_TIME_BUDGET_SECONDS = 10  # Wall-clock time one query may run
+QUERY_PROGRESS_INTERVAL = 10000  # VM instructions between budget checks
+RESULT_CACHE_ENABLED = True  # Serve repeated SELECTs on unchanged data from memory
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Total encoded result bytes kept cached
+RESULT_CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024  # Larger results are never cached
+TOOLS_CACHE_MAX_AGE = 300  # Seconds clients may reuse the /tools manifest (Cache-Control)
+INGEST_CHUNK_SIZE = 50000  # CSV rows read and inserted per executemany during ingest
+INGEST_LOCK_TIMEOUT = 600  # Seconds a load waits for a concurrent load to finish
+# Declared SQLite types for the known (normalized) columns; others are inferred
+COLUMN_TYPES = {
+    "platform": "TEXT",
+    "test_suite": "TEXT",
+    "testcases_passed": "INTEGER",
+    "testcases_executed": "INTEGER",
+    "testcases_failed": "INTEGER",
+    # Versions are labels: "7.10" must stay distinct from "7.1"
+    "release_version": "TEXT",
+}
+SCHEMA_SAMPLE_VALUES = 5  # Distinct example values per column shown in the prompt
+# Indexes on the columns generated queries filter by, rebuilt on every full load
+# (a leftmost prefix of a composite index is already covered by it)
+TABLE_INDEXES = [
+    ("release_version",),
+    ("test_suite", "platform", "release_version"),
+    ("platform", "release_version"),
+]
 REQUEST_TIMEOUT = 10  # Timeout for requests to the MCP server
+# Pooled HTTP client used by mcp_client
+MCP_CONNECT_TIMEOUT = 3  # Seconds to establish a connection to the MCP server
+MCP_READ_TIMEOUT = REQUEST_TIMEOUT  # Seconds to wait for response data
+MCP_MAX_CONNECTIONS = 10  # Connections the client keeps open to the server
+MCP_KEEPALIVE_EXPIRY = 30  # Seconds an idle pooled connection is kept alive
+MCP_MAX_RETRIES = 3  # Retries of a failed idempotent call
+MCP_RETRY_BACKOFF = 0.25  # Base of the jittered exponential backoff, in seconds
+MCP_RETRY_MAX_BACKOFF = 4  # Longest wait between two attempts, in seconds
+# How the app fetches the user and chart queries: "batch" (one request, one
+# snapshot) or "concurrent" (two requests in flight at once on the async client)
+MCP_QUERY_MODE = "batch"
+MCP_TOOLS_CACHE_TTL = 300  # Seconds discovered tools are reused before revalidating
+MAX_NEW_TOKENS = 100  # Upper bound on decode steps for a generated SQL query
+PROMPT_CACHE_ENABLED = True  # Reuse the system prompt KV cache across requests
+# Build SQL from extracted entities without the LLM when the intent is unambiguous
+TEMPLATE_FAST_PATH = True
+GENERATION_BATCH_SIZE = 8  # Questions per model.generate call in generate_sql_queries
+# Restrict decoding to SELECTs over TABLE_NAME and its real columns
+CONSTRAINED_DECODING = os.getenv("CONSTRAINED_DECODING", "false").lower() == "true"
+CONSTRAINED_TOP_K = 64  # Candidate tokens checked against the grammar per step
 
 
 # Attempt to get the MCP server URL
@@ -25,13 +108,3 @@ try:
 except ValueError as e:
     print(f"{e} Please enter the server URL manually:")
     MCP_SERVER_URL = input("Enter MCP_SERVER_URL: ")
-
-# Attempt to get MCP_EXECUTE_TOOL_ENDPOINT
-try:
-    MCP_EXECUTE_TOOL_ENDPOINT = os.getenv("MCP_EXECUTE_TOOL_ENDPOINT")
-    if not MCP_EXECUTE_TOOL_ENDPOINT:
-        raise ValueError("MCP_EXECUTE_TOOL_ENDPOINT not found in environment.")
-except ValueError as e:
-    # Prompt the user to manually enter the endpoint if not found in .env
-    print(f"{e} Please enter the server ENDPOINT manually:")
-    MCP_EXECUTE_TOOL_ENDPOINT = input("Enter MCP_EXECUTE_TOOL_ENDPOINT manually: ")
@@ -1,82 +1,447 @@
 # db_loader.py
 
+import hashlib
 import os
+import time
 import pandas as pd
 import sqlite3
-from config import TABLE_NAME, CSV_PATH, DB_PATH
+from config import (
+    TABLE_NAME,
+    CSV_PATH,
+    DB_PATH,
+    INGEST_CHUNK_SIZE,
+    INGEST_LOCK_TIMEOUT,
+    COLUMN_TYPES,
+    TABLE_INDEXES,
+)
+
+# Records what was last ingested into each table, so unchanged sources are skipped
+INGEST_META_TABLE = "_ingest_meta"
+_HASH_BLOCK_SIZE = 1 << 20
+
+# Bulk-load settings: a load is one transaction, so an interrupted load leaves nothing
+_INGEST_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA cache_size=-65536",
+    # Index builds and ANALYZE sort in temporary files, not in RAM, so peak memory
+    # stays flat however large the table grows
+    "PRAGMA temp_store=FILE",
+)
+
+
+def normalize_column_name(column: str) -> str:
+    """Lowercase, strip whitespace, replace spaces with underscores."""
+    return column.strip().lower().replace(" ", "_")
 
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normalize column names: lowercase, strip whitespace, replace spaces with underscores.
     """
-    df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
+    df.columns = [normalize_column_name(col) for col in df.columns]
     return df
 
 
-def read_csv_safely(csv_path: str) -> pd.DataFrame | None:
+def _csv_dtypes(columns: list[str]) -> dict:
     """
-    Safely reads a CSV file, returning a DataFrame or None if failure occurs.
+    read_csv dtypes that keep columns declared TEXT exactly as written, so a
+    release "7.10" is not parsed as the float 7.1. Keys are the CSV's own names.
     """
-    if not os.path.exists(csv_path):
-        print(f"Error: CSV file '{csv_path}' not found.")
+    return {
+        col: str
+        for col in columns
+        if COLUMN_TYPES.get(normalize_column_name(col)) == "TEXT"
+    }
+
+
+def read_csv_columns(csv_path: str = CSV_PATH) -> list[str]:
+    """
+    Returns the normalized column names that load_csv_to_sqlite writes for the CSV.
+    """
+    header = pd.read_csv(csv_path, nrows=0)
+    return list(normalize_columns(header).columns)
+
+
+def _ensure_meta_table(conn: sqlite3.Connection):
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {INGEST_META_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            source_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            ends_with_newline INTEGER NOT NULL,
+            ingested_at REAL NOT NULL,
+            data_version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({INGEST_META_TABLE})")}
+    if "data_version" not in columns:
+        # Databases ingested before data versions were tracked
+        conn.execute(
+            f"ALTER TABLE {INGEST_META_TABLE} "
+            "ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+def read_fingerprint(conn: sqlite3.Connection, table_name: str) -> dict | None:
+    """
+    Returns the fingerprint of the source last ingested into `table_name`,
+    or None if there is none or the table itself is missing.
+    """
+    _ensure_meta_table(conn)
+    table_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone()
+    row = conn.execute(
+        f"SELECT source_path, size, mtime_ns, sha256, ends_with_newline "
+        f"FROM {INGEST_META_TABLE} WHERE table_name = ?",
+        (table_name,),
+    ).fetchone()
+    if not row or not table_exists:
         return None
+    keys = ("source_path", "size", "mtime_ns", "sha256", "ends_with_newline")
+    return dict(zip(keys, row))
+
+
+def read_data_version(conn: sqlite3.Connection, table_name: str) -> int:
+    """
+    Returns the table's data version, bumped on every ingest that changed its rows
+    (0 if never ingested). Works on read-only connections.
+    """
+    try:
+        row = conn.execute(
+            f"SELECT data_version FROM {INGEST_META_TABLE} WHERE table_name = ?",
+            (table_name,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0  # Database not loaded through db_loader yet
+    return row[0] if row else 0
+
+
+def _write_fingerprint(
+    conn: sqlite3.Connection, table_name: str, fingerprint: dict, data_changed=True
+):
+    _ensure_meta_table(conn)
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO {INGEST_META_TABLE}
+            (table_name, source_path, size, mtime_ns, sha256, ends_with_newline,
+             ingested_at, data_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(
+            (SELECT data_version FROM {INGEST_META_TABLE} WHERE table_name = ?), 0
+        ) + ?)
+        """,
+        (
+            table_name,
+            fingerprint["source_path"],
+            fingerprint["size"],
+            fingerprint["mtime_ns"],
+            fingerprint["sha256"],
+            fingerprint["ends_with_newline"],
+            time.time(),
+            table_name,
+            1 if data_changed else 0,
+        ),
+    )
+
+
+def fingerprint_file(csv_path: str, prefix_size: int | None = None):
+    """
+    Hashes the file in one pass. Returns (fingerprint, prefix_sha256), where
+    prefix_sha256 is the hash of the first `prefix_size` bytes (None if not requested
+    or the file is shorter), used to tell whether a file has only been appended to.
+    """
+    stat = os.stat(csv_path)
+    digest = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+    last_byte = b""
+    with open(csv_path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            if prefix_size is not None and read <= prefix_size <= read + len(block):
+                cut = prefix_size - read
+                digest.update(block[:cut])
+                prefix_digest = digest.hexdigest()
+                digest.update(block[cut:])
+            else:
+                digest.update(block)
+            read += len(block)
+            last_byte = block[-1:]
+
+    fingerprint = {
+        "source_path": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+        "ends_with_newline": int(last_byte == b"\n"),
+    }
+    return fingerprint, prefix_digest
+
+
+def _empty_table_frame(conn: sqlite3.Connection, table_name: str) -> pd.DataFrame:
+    """Zero-row DataFrame carrying the table's columns."""
+    return pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 0", conn)
+
+
+def _sqlite_type(column: str, dtype) -> str:
+    if column in COLUMN_TYPES:
+        return COLUMN_TYPES[column]
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _insert_chunks(
+    conn: sqlite3.Connection, table_name: str, chunks, columns: list[str]
+) -> int:
+    """
+    Bulk-inserts each DataFrame chunk with one executemany, inside the caller's
+    transaction; returns rows written.
+    """
+    placeholders = ", ".join("?" for _ in columns)
+    insert_sql = f"INSERT INTO {table_name} VALUES ({placeholders})"
+    rows = 0
+    for chunk in chunks:
+        chunk.columns = columns
+        conn.executemany(insert_sql, chunk.itertuples(index=False, name=None))
+        rows += len(chunk)
+    return rows
 
+
+def create_indexes(conn: sqlite3.Connection, table_name: str) -> list[str]:
+    """
+    Creates the TABLE_INDEXES whose columns exist in the table and returns their names.
+    """
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")}
+    created = []
+    for columns in TABLE_INDEXES:
+        if not set(columns) <= existing:
+            continue
+        index_name = f"idx_{table_name}_{'_'.join(columns)}"
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} "
+            f"ON {table_name} ({', '.join(columns)})"
+        )
+        created.append(index_name)
+    return created
+
+
+def _append_csv_tail(
+    conn: sqlite3.Connection, csv_path: str, table_name: str, offset: int
+) -> int:
+    """Streams the rows after byte `offset` of the CSV into the table."""
+    columns = read_csv_columns(csv_path)
+    with open(csv_path, "rb") as f:
+        f.seek(offset)
+        try:
+            chunks = pd.read_csv(
+                f,
+                header=None,
+                names=columns,
+                dtype=_csv_dtypes(columns),
+                chunksize=INGEST_CHUNK_SIZE,
+            )
+            rows = _insert_chunks(conn, table_name, chunks, columns)
+        except pd.errors.EmptyDataError:
+            rows = 0  # Only blank lines were added
+    print(f"Appended {rows} new rows from '{csv_path}' to table '{table_name}'.")
+    return rows
+
+
+def _ingest_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Connection for loading: waits up to INGEST_LOCK_TIMEOUT seconds for another
+    process's load to finish, with the bulk-load pragmas applied.
+    """
+    conn = sqlite3.connect(db_path, timeout=INGEST_LOCK_TIMEOUT)
+    for pragma in _INGEST_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _reload_table(
+    conn: sqlite3.Connection,
+    csv_path: str,
+    table_name: str,
+    chunksize: int = INGEST_CHUNK_SIZE,
+) -> int | None:
+    """
+    Replaces the table with the CSV's rows inside the caller's transaction, read
+    `chunksize` rows at a time so memory stays flat regardless of file size, and
+    records the CSV's fingerprint. Readers keep seeing the previous table until the
+    transaction commits. Returns rows loaded, or None if the CSV has no rows.
+    """
     try:
-        df = pd.read_csv(csv_path)
-        if df.empty:
-            print(f"Warning: CSV file '{csv_path}' contains no data.")
-            return None
-        return df
+        header = pd.read_csv(csv_path, nrows=0)
     except pd.errors.EmptyDataError:
         print(f"Warning: CSV file '{csv_path}' is empty.")
-    except Exception as e:
-        print(f"Error reading CSV file '{csv_path}': {e}")
-    return None
+        return None
+    chunks = pd.read_csv(
+        csv_path, dtype=_csv_dtypes(list(header.columns)), chunksize=chunksize
+    )
+    first = next(chunks, None)
+    if first is None or first.empty:
+        print(f"Warning: CSV file '{csv_path}' contains no data.")
+        return None
+
+    # Column names are normalized once and reused for every chunk
+    first = normalize_columns(first)
+    columns = list(first.columns)
+    column_defs = ", ".join(
+        f'"{col}" {_sqlite_type(col, dtype)}' for col, dtype in first.dtypes.items()
+    )
+    conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+    conn.execute(f"CREATE TABLE {table_name} ({column_defs})")
+    rows = _insert_chunks(conn, table_name, [first], columns)
+    rows += _insert_chunks(conn, table_name, chunks, columns)
 
+    # Index once after the bulk insert
+    create_indexes(conn, table_name)
+    conn.execute(f"ANALYZE {table_name}")
+    _write_fingerprint(conn, table_name, fingerprint_file(csv_path)[0])
+    print(f"Data loaded from CSV '{csv_path}' to table '{table_name}' ({rows} rows).")
+    return rows
 
-def write_df_to_sqlite(
-    df: pd.DataFrame, db_path: str, table_name: str
+
+def stream_csv_to_sqlite(
+    csv_path: str, db_path: str, table_name: str, chunksize: int = INGEST_CHUNK_SIZE
 ) -> sqlite3.Connection | None:
     """
-    Writes the DataFrame into the SQLite database and returns the connection.
+    Replaces the table with the CSV's rows in one transaction, streamed in chunks
+    (see _reload_table), regardless of what the database already holds.
+    Returns the connection, or None if the CSV has no rows or the load fails.
     """
+    conn = None
     try:
-        conn = sqlite3.connect(db_path)
-        df.to_sql(table_name, conn, index=False, if_exists="replace")
-        print(
-            f"Data loaded from CSV to SQLite database '{db_path}', table '{table_name}'."
-        )
-        return conn
-    except sqlite3.Error as e:
-        print(f"Error writing to SQLite database '{db_path}': {e}")
+        conn = _ingest_connection(db_path)
+        conn.execute("BEGIN IMMEDIATE")
+        if _reload_table(conn, csv_path, table_name, chunksize) is not None:
+            conn.commit()
+            conn.execute("PRAGMA synchronous=NORMAL")
+            return conn
+    except (sqlite3.Error, pd.errors.ParserError, ValueError) as e:
+        print(f"Error loading CSV file '{csv_path}' into '{db_path}': {e}")
+    except BaseException:
         if conn:
-            conn.close()
+            conn.close()  # Releases the write lock along with the rollback
+        raise
+    if conn:
+        conn.close()  # Rolls back whatever the load wrote
     return None
 
 
+def _declared_types_changed(conn: sqlite3.Connection, table_name: str) -> bool:
+    """True if a COLUMN_TYPES entry differs from the type the table was created with."""
+    declared = {
+        row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({table_name})")
+    }
+    return any(
+        column in declared and declared[column] != sql_type
+        for column, sql_type in COLUMN_TYPES.items()
+    )
+
+
+def _load_incrementally(
+    conn: sqlite3.Connection, csv_path: str, table_name: str
+) -> bool:
+    """
+    Brings the table up to date without a full reload when the fingerprint allows it,
+    inside the caller's transaction. Returns False if a full reload is needed.
+    """
+    previous = read_fingerprint(conn, table_name)
+    if not previous or previous["source_path"] != os.path.abspath(csv_path):
+        return False
+    if _declared_types_changed(conn, table_name):
+        print(f"Column types of '{table_name}' changed, reloading it fully.")
+        return False
+
+    # Cheapest check first: size and mtime untouched means nothing to do
+    stat = os.stat(csv_path)
+    if previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+        print(f"Table '{table_name}' is up to date with '{csv_path}', skipping load.")
+        return True
+
+    fingerprint, prefix_digest = fingerprint_file(csv_path, previous["size"])
+
+    if fingerprint["sha256"] == previous["sha256"]:
+        # Touched but not modified
+        _write_fingerprint(conn, table_name, fingerprint, data_changed=False)
+        print(f"Table '{table_name}' is up to date with '{csv_path}', skipping load.")
+        return True
+
+    # Only rows were added: the old content is an unchanged, newline-terminated prefix
+    if (
+        fingerprint["size"] > previous["size"]
+        and prefix_digest == previous["sha256"]
+        and previous["ends_with_newline"]
+    ):
+        if _append_csv_tail(conn, csv_path, table_name, previous["size"]):
+            conn.execute(f"ANALYZE {table_name}")  # Keep planner statistics current
+        _write_fingerprint(conn, table_name, fingerprint)
+        return True
+
+    return False
+
+
 def load_csv_to_sqlite(csv_path=CSV_PATH, table_name=TABLE_NAME, db_path=DB_PATH):
     """
-    Loads data from a CSV into a SQLite DB.
-    Returns (connection, dataframe) if successful, else (None, None).
+    Loads data from a CSV into a SQLite DB, skipping work the database already holds:
+    an unchanged source (same fingerprint) is not re-read, and a source that has
+    only grown has just its new rows appended. Full loads are streamed in chunks.
+    The fingerprint check, the load and the new fingerprint share one write
+    transaction, so concurrent loads run one after the other and a load that dies
+    halfway leaves the table and its fingerprint as they were.
+    Returns (connection, zero-row dataframe with the table's columns) if successful,
+    else (None, None).
     """
-    df = read_csv_safely(csv_path)
-    if df is None:
+    if not os.path.exists(csv_path):
+        print(f"Error: CSV file '{csv_path}' not found.")
         return None, None
 
-    df = normalize_columns(df)
-    conn = write_df_to_sqlite(df, db_path, table_name)
+    conn = None
+    try:
+        conn = _ingest_connection(db_path)
+        # Taken before reading the fingerprint: a concurrent load waits here and
+        # then finds the fingerprint this one writes
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("SAVEPOINT incremental_load")
+        try:
+            loaded = _load_incrementally(conn, csv_path, table_name)
+        except (sqlite3.Error, pd.errors.ParserError) as e:
+            print(f"Incremental load of '{csv_path}' failed, reloading it fully: {e}")
+            conn.execute("ROLLBACK TO incremental_load")
+            loaded = False
+        conn.execute("RELEASE incremental_load")
 
-    return (conn, df) if conn else (None, None)
+        if loaded or _reload_table(conn, csv_path, table_name) is not None:
+            conn.commit()
+            conn.execute("PRAGMA synchronous=NORMAL")
+            return conn, _empty_table_frame(conn, table_name)
+    except (sqlite3.Error, pd.errors.ParserError, ValueError) as e:
+        print(f"Error loading CSV file '{csv_path}' into '{db_path}': {e}")
+    except BaseException:
+        if conn:
+            conn.close()  # Releases the write lock along with the rollback
+        raise
+    if conn:
+        conn.close()  # Rolls back whatever the load wrote
+    return None, None
 
 
 # Script entry point for local testing
 if __name__ == "__main__":
     conn, df = load_csv_to_sqlite()
     if conn and df is not None:
-        print(f"Successfully loaded {len(df)} rows.")
         try:
             cursor = conn.cursor()
+            row_count = cursor.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+            print(f"Successfully loaded {row_count} rows.")
             cursor.execute(f"SELECT * FROM {TABLE_NAME} LIMIT 5")
             print("Sample data:")
             for row in cursor.fetchall():
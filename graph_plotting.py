@@ -6,14 +6,14 @@ import streamlit as st
 import base64
 import io
 import uuid
+from agents.sql_analysis import analyze_sql
 
 logger = logging.getLogger(__name__)
 
 
 def extract_conditions_from_sql(sql_query):
-    where_index = sql_query.lower().find("where")
-    if where_index != -1:
-        conditions = sql_query[where_index + len("where") :].strip()
+    conditions = analyze_sql(sql_query).where
+    if conditions:
         logger.info(f"Extracted conditions: {conditions}")
         return conditions
     logger.warning("No conditions found in SQL query.")
@@ -0,0 +1,50 @@
+import json
+import numpy as np
+import requests
+from config import INFERENCE_SERVER_URL, INFERENCE_REQUEST_TIMEOUT
+
+
+def call_inference_service(question: str) -> str:
+    """
+    Sends a natural language question to the inference server and returns the SQL.
+    """
+    return _post(
+        "generate_sql",
+        {"question": question, "timeout": INFERENCE_REQUEST_TIMEOUT},
+    )["sql"]
+
+
+def call_embedding_service(questions: list[str]) -> np.ndarray:
+    """
+    Embeds questions on the inference server; same contract as
+    semantic_cache.encode_questions (L2-normalized float32 rows).
+    """
+    embeddings = _post("embed_questions", {"questions": questions})["embeddings"]
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _post(endpoint: str, payload: dict) -> dict:
+    try:
+        response = requests.post(
+            url=f"{INFERENCE_SERVER_URL}/{endpoint}",
+            json=payload,
+            # Leave the server time to report its own deadline as a 504
+            timeout=INFERENCE_REQUEST_TIMEOUT + 5,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    except requests.exceptions.ConnectionError as conn_err:
+        raise requests.exceptions.ConnectionError(
+            f"Could not connect to the inference server at {INFERENCE_SERVER_URL}. "
+            "Please ensure 'inference_server.py' is running."
+        ) from conn_err
+
+    except requests.exceptions.HTTPError as http_err:
+        try:
+            error_detail = http_err.response.json().get("detail", str(http_err))
+        except json.JSONDecodeError:
+            error_detail = http_err.response.text
+        raise requests.exceptions.HTTPError(
+            f"Error from inference server: {error_detail}"
+        ) from http_err
@@ -0,0 +1,199 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+from log_generator import log_function
+from agents.prompt_builder import generate_sql_queries
+from model_loader import warmup_model
+from config import (
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+    INFERENCE_REQUEST_TIMEOUT,
+)
+
+logging = log_function("Inference")
+
+
+class GenerateSQLRequest(BaseModel):
+    """Request model for generating SQL from a natural language question."""
+
+    question: str
+    # Seconds until the caller gives up on this request; None uses the server default
+    timeout: float | None = Field(default=None, gt=0)
+
+
+class EmbedQuestionsRequest(BaseModel):
+    """Request model for embedding questions for the app's semantic cache."""
+
+    questions: list[str]
+
+
+class _PendingQuestion:
+    def __init__(self, question: str, deadline: float, future: asyncio.Future):
+        self.question = question
+        self.deadline = deadline
+        self.future = future
+
+
+class MicroBatcher:
+    """
+    Queues questions and coalesces those arriving within `max_wait` seconds of each
+    other into one generate_sql_queries call of at most `max_batch_size` questions.
+    The model runs on a single worker thread so it is never used concurrently.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue[_PendingQuestion] = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, question: str, timeout: float) -> str:
+        """Enqueues a question and waits for its SQL until the deadline passes."""
+        loop = asyncio.get_running_loop()
+        pending = _PendingQuestion(
+            question, time.monotonic() + timeout, loop.create_future()
+        )
+        await self._queue.put(pending)
+        # shield keeps a timed-out caller from cancelling the batch it belongs to
+        return await asyncio.wait_for(asyncio.shield(pending.future), timeout)
+
+    async def _collect_batch(self) -> list[_PendingQuestion]:
+        batch = [await self._queue.get()]
+        window_end = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = window_end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+
+            # Don't spend model time on requests whose callers have already given up
+            now = time.monotonic()
+            live = [p for p in batch if p.deadline > now and not p.future.done()]
+            if not live:
+                continue
+
+            try:
+                sqls = await loop.run_in_executor(
+                    self._executor,
+                    generate_sql_queries,
+                    [p.question for p in live],
+                    "",
+                    len(live),
+                )
+            except Exception as e:
+                logging.error(f"Batch generation failed: {e}")
+                for pending in live:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                continue
+
+            logging.info(f"Generated SQL for a batch of {len(live)} question(s)")
+            for pending, sql in zip(live, sqls):
+                if not pending.future.done():
+                    pending.future.set_result(sql)
+
+
+batcher = MicroBatcher(INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS / 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the weights before accepting traffic so the first request isn't penalised
+    logging.info("Warming up model")
+    await asyncio.get_running_loop().run_in_executor(None, warmup_model)
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+logging.info("Creating FastAPI app instance")
+app = FastAPI(
+    title="Gen BI Inference Server",
+    description="Local NL-to-SQL service that owns the model and micro-batches requests.",
+    lifespan=lifespan,
+)
+
+
+@app.get("/health", summary="Check that the model is loaded")
+async def health():
+    return {"status": "ok"}
+
+
+@app.post("/generate_sql", summary="Generate SQL for a natural language question")
+async def generate_sql(request: GenerateSQLRequest):
+    """
+    Queues the question for the next micro-batch and returns the generated SQL.
+    Responds with 422 for a timeout that is not positive, and with 504 if the SQL is
+    not ready before the request's deadline.
+    """
+    timeout = (
+        INFERENCE_REQUEST_TIMEOUT if request.timeout is None else request.timeout
+    )
+    try:
+        sql = await batcher.submit(request.question, timeout)
+        return {"status": "success", "sql": sql}
+
+    except asyncio.TimeoutError as e:
+        logging.error(f"Inference {HTTPStatus.GATEWAY_TIMEOUT}/deadline exceeded")
+        raise HTTPException(
+            status_code=HTTPStatus.GATEWAY_TIMEOUT,
+            detail=f"SQL generation did not finish within {timeout} seconds.",
+        ) from e
+
+    except Exception as e:
+        logging.error(f"Inference {HTTPStatus.INTERNAL_SERVER_ERROR}")
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {e}",
+        ) from e
+
+
+@app.post("/embed_questions", summary="Embed questions for the semantic cache")
+async def embed_questions(request: EmbedQuestionsRequest):
+    """
+    Returns one L2-normalized embedding per question, so the app's semantic cache
+    works without loading sentence-transformers (and torch) in the Streamlit process.
+    """
+    from semantic_cache import encode_questions
+
+    try:
+        vectors = await asyncio.get_running_loop().run_in_executor(
+            None, encode_questions, request.questions
+        )
+        return {"status": "success", "embeddings": vectors.tolist()}
+
+    except Exception as e:
+        logging.error(f"Embedding {HTTPStatus.INTERNAL_SERVER_ERROR}")
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {e}",
+        ) from e
+
+
+# Entry point when script is run directly
+if __name__ == "__main__":
+    print("Starting inference FastAPI server...")
+    uvicorn.run(app, host="127.0.0.1", port=8001)
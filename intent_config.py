@@ -3,6 +3,7 @@
 PATTERN_CONFIG = {
     "TEST_SUITE": {
         "label": "Test_suite",
+        "column": "test_suite",
         # Improved pattern: stops at space, comma, 'and', or punctuation
         "patterns": [
             r"(?:test[_\s]?suite(?: is| equals| equal to)?|suite)\s*['\"]?([^\s,'\"?]+)['\"]?",
@@ -12,6 +13,7 @@ PATTERN_CONFIG = {
     },
     "PLATFORM": {
         "label": "Platform",
+        "column": "platform",
         # Improved pattern: handles both quoted and unquoted inputs
         "patterns": [
             r"(?:platform(?: is| equals| equal to)?)\s*['\"]?([^\s,'\"?]+)['\"]?",
@@ -21,6 +23,7 @@ PATTERN_CONFIG = {
     },
     "RELEASE_VERSION": {
         "label": "Release version",
+        "column": "release_version",
         # Improved pattern: stops before common boundaries
         "patterns": [
             r"(?:release(?:[_\s]?version)?(?: is| equals| equal to)?)\s*['\"]?([^\s,'\"?]+)['\"]?",
@@ -31,12 +34,14 @@ PATTERN_CONFIG = {
     "TESTCASES_EXECUTED": {
         "label": "Metric",
         "metric_name": "testcases executed",
+        "column": "testcases_executed",
         "patterns": [r"(?:test[\s]?cases? executed|executed test[\s]?cases?)"],
         "is_metric": True,
     },
     "TESTCASES_PASSED": {
         "label": "Metric",
         "metric_name": "testcases passed",
+        "column": "testcases_passed",
         "patterns": [r"(?:test[\s]?cases? passed|passed test[\s]?cases?)"],
         "is_metric": True,
     },
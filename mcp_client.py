@@ -1,81 +1,565 @@
+import asyncio
+import atexit
 import json
-import requests
-from config import MCP_SERVER_URL, MCP_EXECUTE_TOOL_ENDPOINT, REQUEST_TIMEOUT
-import requests
+import random
+import threading
+import time
+import weakref
+import httpx
+from config import (
+    MCP_SERVER_URL,
+    MCP_CONNECT_TIMEOUT,
+    MCP_READ_TIMEOUT,
+    MCP_MAX_CONNECTIONS,
+    MCP_KEEPALIVE_EXPIRY,
+    MCP_MAX_RETRIES,
+    MCP_RETRY_BACKOFF,
+    MCP_RETRY_MAX_BACKOFF,
+    MCP_TOOLS_CACHE_TTL,
+)
+from result_encoding import (
+    ARROW_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE,
+    decode_dataframe,
+    payload_dataframe,
+    supported_media_types,
+)
 
-def call_mcp_sql_executor(sql_query: str) -> dict:
+# HTTP/2 needs the optional h2 package (httpx[http2]); HTTP/1.1 keep-alive otherwise
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Statuses worth retrying: the server is restarting, overloaded or behind a proxy
+RETRYABLE_STATUSES = {502, 503, 504}
+
+DEFAULT_TIMEOUT = httpx.Timeout(
+    connect=MCP_CONNECT_TIMEOUT,
+    read=MCP_READ_TIMEOUT,
+    write=MCP_READ_TIMEOUT,
+    pool=MCP_CONNECT_TIMEOUT,
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+# An AsyncClient's connections belong to the event loop that opened them, so each
+# loop gets its own; sync callers share one background loop (see run_sync)
+_async_clients = weakref.WeakKeyDictionary()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+class MCPServerError(RuntimeError):
+    """The MCP server answered with an error status."""
+
+    def __init__(self, message: str, status_code: int | None = None, detail=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class MCPQueryRejectedError(MCPServerError):
+    """
+    The MCP server refused or stopped a query because it tripped a cost guard.
+    `guard` names it ("plan_cost", "op_budget", "time_budget"); `detail` is the
+    server's structured error.
+    """
+
+    def __init__(self, context: str, detail: dict, status_code: int | None = None):
+        super().__init__(
+            f"Query rejected by MCP Server during {context}: {detail.get('message')}",
+            status_code,
+            detail,
+        )
+        self.guard = detail.get("guard")
+
+
+class ToolDiscoveryCache:
+    """
+    TTL cache for the /tools manifest. Within the TTL discovery costs nothing; after
+    it the cached manifest is revalidated with If-None-Match, so an unchanged
+    manifest costs a bodyless 304 instead of a full download.
+    """
+
+    def __init__(self, ttl: float = MCP_TOOLS_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tools = None
+        self._etag = None
+        self._expires_at = 0.0
+        self.stats = {"hits": 0, "revalidated": 0, "fetched": 0}
+
+    def fresh(self) -> list | None:
+        """The cached tools if still within the TTL (counted as a hit), else None."""
+        with self._lock:
+            if self._tools is not None and time.monotonic() < self._expires_at:
+                self.stats["hits"] += 1
+                return self._tools
+        return None
+
+    def conditional(self) -> tuple[dict, tuple | None]:
+        """
+        Request headers for revalidation, and the (tools, etag) snapshot they
+        validate; pass the snapshot to update() with the response. Taken under one
+        lock, so an invalidate() while the request is in flight cannot strand a 304.
+        """
+        with self._lock:
+            if self._tools is not None and self._etag:
+                return {"If-None-Match": self._etag}, (self._tools, self._etag)
+        return {}, None
+
+    def update(self, response: httpx.Response, validated: tuple | None = None) -> list:
+        """
+        Stores a 200 manifest, or on 304 renews the `validated` snapshot the
+        conditional request was made for, and returns the tools.
+        """
+        with self._lock:
+            if response.status_code == 304 and validated is not None:
+                self._tools, self._etag = validated
+                self.stats["revalidated"] += 1
+            else:
+                self._tools = _response_json("tool discovery", response)
+                self._etag = response.headers.get("ETag")
+                self.stats["fetched"] += 1
+            self._expires_at = time.monotonic() + self.ttl
+            return self._tools
+
+    def invalidate(self):
+        with self._lock:
+            self._tools = None
+            self._etag = None
+            self._expires_at = 0.0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot.update(cached=self._tools is not None, ttl_seconds=self.ttl)
+        return snapshot
+
+
+# Shared by every discovery call in this process, sync and async
+tool_cache = ToolDiscoveryCache()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    The process-wide pooled client for the MCP server: connections are kept alive
+    and reused across calls (and Streamlit sessions), over HTTP/2 when available.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(**_client_options())
+        return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    The pooled async client for the running event loop, created on first use.
+    Must be called from a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(**_client_options())
+    return client
+
+
+def run_sync(coroutine):
+    """
+    Runs a coroutine on the shared background event loop and waits for its result.
+    Safe to call from any thread without a running loop, including Streamlit's
+    script thread: the loop (and its pooled async client) outlives each rerun.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="mcp-client-loop", daemon=True
+            ).start()
+    return asyncio.run_coroutine_threadsafe(coroutine, _loop).result()
+
+
+@atexit.register
+def close_http_client():
+    """Closes the pooled clients; the next call opens new ones."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+    with _loop_lock:
+        client = _async_clients.pop(_loop, None) if _loop is not None else None
+    if client is not None:
+        run_sync(client.aclose())
+
+
+def call_mcp_sql_executor(
+    sql_query: str,
+    stream: bool = False,
+    page_size: int | None = None,
+    page_token: str | None = None,
+    timeout: httpx.Timeout | None = None,
+) -> dict:
     """
     Sends a SQL query to the MCP server and returns the response JSON.
+    With stream=True the rows are read incrementally from the NDJSON endpoint and
+    assembled into the same shape. page_size/page_token request a single page.
     """
-    try:
-        response = requests.post(
-            url="https://gen-bi-ppn3.onrender.com/execute_select_sql_query",
-            json={"sql_query": sql_query},
-            timeout=REQUEST_TIMEOUT,
+    if stream:
+        meta = {}
+        data = list(iter_mcp_sql_rows(sql_query, meta, timeout=timeout))
+        return {
+            "status": "success",
+            "data": data,
+            "columns": meta["columns"],
+            "truncated": meta["truncated"],
+        }
+
+    response = _send(
+        "SQL execution",
+        "POST",
+        "/execute_select_sql_query",
+        json=_sql_payload(sql_query, page_size=page_size, page_token=page_token),
+        timeout=timeout,
+    )
+    return _response_json("SQL execution", response)
+
+
+def call_mcp_sql_dataframe(
+    sql_query: str, timeout: httpx.Timeout | None = None, **page_args
+):
+    """
+    Runs a SQL query on the MCP server and decodes the result straight into a pandas
+    DataFrame, asking for Arrow IPC when pyarrow is installed and columnar JSON
+    otherwise. page_size/page_token are forwarded; see decode_dataframe for attrs.
+    """
+    response = _send(
+        "SQL execution",
+        "POST",
+        "/execute_select_sql_query",
+        json=_sql_payload(sql_query, **page_args),
+        headers=_dataframe_headers(),
+        timeout=timeout,
+    )
+    return _response_dataframe("SQL execution", response)
+
+
+def call_mcp_sql_dataframes(
+    sql_queries: list[str], timeout: httpx.Timeout | None = None
+) -> list:
+    """
+    Runs several SQL queries on the MCP server as concurrent requests and returns
+    one pandas DataFrame per query, in order. Unlike call_mcp_sql_executor_batch
+    each query reads its own snapshot, but none waits for another.
+    """
+
+    async def gather():
+        return await asyncio.gather(
+            *(acall_mcp_sql_dataframe(sql, timeout=timeout) for sql in sql_queries)
         )
-        response.raise_for_status()
-        return response.json()
-        
-    except requests.exceptions.ConnectionError as conn_err:
-        _raise_connection_error("SQL execution", conn_err)
 
-    except requests.exceptions.HTTPError as http_err:
-        _raise_http_error("SQL execution", http_err)
+    return run_sync(gather())
+
+
+def call_mcp_sql_executor_batch(
+    sql_queries: list[str], timeout: httpx.Timeout | None = None
+) -> list:
+    """
+    Runs several SQL queries on the MCP server in one round trip (one connection,
+    one snapshot) and returns one pandas DataFrame per query, in order.
+    """
+    response = _send(
+        "batch SQL execution",
+        "POST",
+        "/execute_select_sql_queries",
+        json={"sql_queries": sql_queries},
+        headers={"Accept": COLUMNAR_MEDIA_TYPE},
+        timeout=timeout,
+    )
+    payload = _response_json("batch SQL execution", response)
+    return [payload_dataframe(result) for result in payload["results"]]
+
+
+def iter_mcp_sql_rows(
+    sql_query: str, meta: dict | None = None, timeout: httpx.Timeout | None = None
+):
+    """
+    Streams a SQL query's result from the MCP server, yielding one row dict at a time
+    as lines arrive. If `meta` is given it receives "columns" once the header is read
+    and "truncated"/"row_count" once the stream completes.
+    """
+    meta = {} if meta is None else meta
+    response = _send(
+        "SQL streaming",
+        "POST",
+        "/execute_select_sql_query/stream",
+        json={"sql_query": sql_query},
+        timeout=timeout,
+        stream=True,
+    )
+    try:
+        columns = None
+        for line in response.iter_lines():
+            if not line:
+                continue
+            message = json.loads(line)
+            # Rows are JSON arrays; the header and trailer are objects
+            if isinstance(message, list):
+                yield dict(zip(columns, message))
+            elif columns is None:
+                columns = meta["columns"] = message["columns"]
+            elif message.get("status") == "error":
+                if isinstance(message["detail"], dict):
+                    raise MCPQueryRejectedError("SQL streaming", message["detail"])
+                raise MCPServerError(
+                    f"Error from MCP Server during SQL streaming: {message['detail']}"
+                )
+            else:
+                meta["truncated"] = message["truncated"]
+                meta["row_count"] = message["row_count"]
+                return
+
+        raise RuntimeError("MCP Server closed the SQL result stream early.")
+
+    except httpx.TransportError as conn_err:
+        _raise_connection_error("SQL streaming", conn_err)
 
     except json.JSONDecodeError as json_err:
         raise RuntimeError(
-            f"Failed to decode JSON response from MCP Server during SQL execution: {json_err}."
+            f"Failed to decode NDJSON line from MCP Server during SQL streaming: {json_err}."
         ) from json_err
 
-    except Exception as e:
-        raise RuntimeError(
-            f"An unexpected error occurred during MCP SQL execution: {e}"
-        ) from e
+    finally:
+        response.close()
 
 
-def discover_mcp_tools() -> list:
+def discover_mcp_tools(use_cache: bool = True) -> list:
     """
     Retrieves available tools from the MCP server.
+    With use_cache (the default) the manifest comes from tool_cache while fresh
+    and is revalidated with a conditional request once it expires.
     """
-    try:
-        response = requests.get("https://gen-bi-ppn3.onrender.com/tools", timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
+    if not use_cache:
+        return _response_json("tool discovery", _send("tool discovery", "GET", "/tools"))
+    tools = tool_cache.fresh()
+    if tools is not None:
+        return tools
+    headers, validated = tool_cache.conditional()
+    response = _send("tool discovery", "GET", "/tools", headers=headers)
+    return tool_cache.update(response, validated)
 
-        try:
-            return response.json()
-        except json.JSONDecodeError as json_err:
-            raise RuntimeError(
-                f"Failed to decode JSON response from MCP Server during tool discovery: "
-                f"{json_err}. Response: {response.text}"
-            ) from json_err
 
-    except requests.exceptions.ConnectionError as conn_err:
-        _raise_connection_error("tool discovery", conn_err)
+# --- Async variants, sharing a pooled AsyncClient per event loop --- #
 
-    except requests.exceptions.HTTPError as http_err:
-        _raise_http_error("tool discovery", http_err)
 
-    except Exception as e:
-        raise RuntimeError(
-            f"An unexpected error occurred during MCP tool discovery: {e}"
-        ) from e
+async def acall_mcp_sql_executor(
+    sql_query: str,
+    page_size: int | None = None,
+    page_token: str | None = None,
+    timeout: httpx.Timeout | None = None,
+) -> dict:
+    """Async call_mcp_sql_executor (without streaming)."""
+    response = await _asend(
+        "SQL execution",
+        "POST",
+        "/execute_select_sql_query",
+        json=_sql_payload(sql_query, page_size=page_size, page_token=page_token),
+        timeout=timeout,
+    )
+    return _response_json("SQL execution", response)
+
+
+async def acall_mcp_sql_dataframe(
+    sql_query: str, timeout: httpx.Timeout | None = None, **page_args
+):
+    """Async call_mcp_sql_dataframe."""
+    response = await _asend(
+        "SQL execution",
+        "POST",
+        "/execute_select_sql_query",
+        json=_sql_payload(sql_query, **page_args),
+        headers=_dataframe_headers(),
+        timeout=timeout,
+    )
+    return _response_dataframe("SQL execution", response)
+
+
+async def adiscover_mcp_tools(use_cache: bool = True) -> list:
+    """Async discover_mcp_tools, sharing tool_cache with it."""
+    if not use_cache:
+        response = await _asend("tool discovery", "GET", "/tools")
+        return _response_json("tool discovery", response)
+    tools = tool_cache.fresh()
+    if tools is not None:
+        return tools
+    headers, validated = tool_cache.conditional()
+    response = await _asend("tool discovery", "GET", "/tools", headers=headers)
+    return tool_cache.update(response, validated)
 
 
 # --- Private helper functions --- #
 
 
+def _client_options() -> dict:
+    return dict(
+        base_url=MCP_SERVER_URL,
+        http2=HTTP2_AVAILABLE,
+        timeout=DEFAULT_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=MCP_MAX_CONNECTIONS,
+            max_keepalive_connections=MCP_MAX_CONNECTIONS,
+            keepalive_expiry=MCP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def _sql_payload(sql_query: str, page_size=None, page_token=None) -> dict:
+    payload = {"sql_query": sql_query}
+    if page_size is not None:
+        payload["page_size"] = page_size
+    if page_token is not None:
+        payload["page_token"] = page_token
+    return payload
+
+
+def _dataframe_headers() -> dict:
+    """Prefers Arrow IPC when pyarrow is installed, columnar JSON otherwise."""
+    if ARROW_MEDIA_TYPE in supported_media_types():
+        return {"Accept": f"{ARROW_MEDIA_TYPE}, {COLUMNAR_MEDIA_TYPE};q=0.9"}
+    return {"Accept": COLUMNAR_MEDIA_TYPE}
+
+
+def _response_json(context: str, response: httpx.Response):
+    try:
+        return response.json()
+    except json.JSONDecodeError as json_err:
+        raise RuntimeError(
+            f"Failed to decode JSON response from MCP Server during {context}: "
+            f"{json_err}. Response: {response.text[:200]}"
+        ) from json_err
+
+
+def _response_dataframe(context: str, response: httpx.Response):
+    try:
+        return decode_dataframe(
+            response.headers.get("Content-Type", ""), response.content, response.headers
+        )
+    except json.JSONDecodeError as json_err:
+        raise RuntimeError(
+            f"Failed to decode JSON response from MCP Server during {context}: {json_err}."
+        ) from json_err
+
+
+def _backoff_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Full-jitter exponential backoff, but never shorter than a Retry-After header."""
+    delay = random.uniform(0, min(MCP_RETRY_MAX_BACKOFF, MCP_RETRY_BACKOFF * 2**attempt))
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), MCP_RETRY_MAX_BACKOFF))
+    return delay
+
+
+def _should_retry(conn_err: httpx.TransportError, idempotent: bool) -> bool:
+    """Connection failures never reached the server; anything later may have."""
+    if isinstance(conn_err, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return idempotent
+
+
+def _send(
+    context: str,
+    method: str,
+    path: str,
+    idempotent: bool = True,
+    stream: bool = False,
+    timeout: httpx.Timeout | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Sends a request over the pooled client and returns the successful response.
+    Connection failures are always retried (nothing reached the server); timeouts
+    and 502/503/504 responses are retried only for idempotent calls, which every
+    SELECT-only MCP call is. Streamed responses must be closed by the caller.
+    """
+    client = get_http_client()
+    request = client.build_request(
+        method, path, timeout=timeout or DEFAULT_TIMEOUT, **kwargs
+    )
+    for attempt in range(MCP_MAX_RETRIES + 1):
+        last_try = attempt == MCP_MAX_RETRIES
+        try:
+            response = client.send(request, stream=stream)
+        except httpx.TransportError as conn_err:
+            if last_try or not _should_retry(conn_err, idempotent):
+                _raise_connection_error(context, conn_err)
+            time.sleep(_backoff_delay(attempt))
+            continue
+
+        if response.status_code in RETRYABLE_STATUSES and idempotent and not last_try:
+            response.close()
+            time.sleep(_backoff_delay(attempt, response))
+            continue
+        if response.is_error:
+            if stream:
+                response.read()
+            response.close()
+            _raise_http_error(context, response)
+        return response
+
+
+async def _asend(
+    context: str,
+    method: str,
+    path: str,
+    idempotent: bool = True,
+    timeout: httpx.Timeout | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """_send on the running loop's async client, with the same retry policy."""
+    client = get_async_http_client()
+    request = client.build_request(
+        method, path, timeout=timeout or DEFAULT_TIMEOUT, **kwargs
+    )
+    for attempt in range(MCP_MAX_RETRIES + 1):
+        last_try = attempt == MCP_MAX_RETRIES
+        try:
+            response = await client.send(request)
+        except httpx.TransportError as conn_err:
+            if last_try or not _should_retry(conn_err, idempotent):
+                _raise_connection_error(context, conn_err)
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+
+        if response.status_code in RETRYABLE_STATUSES and idempotent and not last_try:
+            await asyncio.sleep(_backoff_delay(attempt, response))
+            continue
+        if response.is_error:
+            _raise_http_error(context, response)
+        return response
+
+
 def _raise_connection_error(context: str, conn_err: Exception):
-    raise requests.exceptions.ConnectionError(
+    raise ConnectionError(
         f"Could not connect to MCP Server at {MCP_SERVER_URL} during {context}. "
         "Please ensure 'mcp_server.py' is running."
     ) from conn_err
 
 
-def _raise_http_error(context: str, http_err: Exception):
+def _raise_http_error(context: str, response: httpx.Response):
     try:
-        error_detail = http_err.response.json().get("detail", str(http_err))
+        error_detail = response.json().get("detail", response.reason_phrase)
     except json.JSONDecodeError:
-        error_detail = http_err.response.text
-    raise requests.exceptions.HTTPError(
-        f"Error from MCP Server during {context}: {error_detail}"
-    ) from http_err
+        error_detail = response.text
+    if isinstance(error_detail, dict) and "guard" in error_detail:
+        raise MCPQueryRejectedError(context, error_detail, response.status_code)
+    raise MCPServerError(
+        f"Error from MCP Server during {context}: {error_detail}",
+        response.status_code,
+        error_detail,
+    )
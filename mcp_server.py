@@ -1,9 +1,16 @@
-import re
-from typing import List, Dict, Any
+import json
+import base64
+import hashlib
+from contextlib import ExitStack, nullcontext
+from typing import List, Dict, Any, Optional
 import sqlite3
+import threading
+import anyio
 from http import HTTPStatus
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from log_generator import log_function
 
@@ -11,9 +18,42 @@ logging = log_function("MCP")
 
 # Import the database connection and execution logic from agents
 logging.info("Importing DataBase Connection")
-from agents.query_executor import get_db_connection, execute_query
-from db_loader import load_csv_to_sqlite
-from config import CSV_PATH, TABLE_NAME, DB_PATH
+from agents.query_executor import (
+    db_pool,
+    execute_query_capped,
+    paginate_query,
+    query_executor,
+    QueueFullError,
+)
+from agents.query_guard import query_guard, QueryRejected
+from agents.sql_analysis import analyze_sql
+from db_loader import load_csv_to_sqlite, read_data_version
+from result_cache import normalize_sql, result_cache
+from result_encoding import (
+    ARROW_MEDIA_TYPE,
+    JSON_MEDIA_TYPES,
+    NEXT_PAGE_TOKEN_HEADER,
+    TRUNCATED_HEADER,
+    encode_result,
+    negotiate,
+    json_default,
+    result_payload,
+    supported_media_types,
+)
+from config import (
+    CSV_PATH,
+    TABLE_NAME,
+    DB_PATH,
+    QUERY_RETRY_AFTER_SECONDS,
+    MAX_RESULT_ROWS,
+    STREAM_FETCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    MAX_BATCH_QUERIES,
+    RESULT_CACHE_ENABLED,
+    QUERY_GUARD_ENABLED,
+    TOOLS_CACHE_MAX_AGE,
+)
 
 logging.info("DataBase Initialized")
 # Ensure the database is initialized on server startup
@@ -41,6 +81,14 @@ class SQLQueryRequest(BaseModel):
     """Request model for executing SQL queries."""
 
     sql_query: str
+    page_size: Optional[int] = None  # Set this (or page_token) to fetch one page
+    page_token: Optional[str] = None  # next_page_token from the previous response
+
+
+class SQLBatchRequest(BaseModel):
+    """Request model for executing several SQL queries in one round trip."""
+
+    sql_queries: List[str]
 
 
 class ToolInfo(BaseModel):
@@ -51,43 +99,83 @@ class ToolInfo(BaseModel):
     parameters: Dict[str, Any]
 
 
+# The manifest never changes while the server runs: build it, its bytes and its
+# strong validator once instead of on every discovery request
+TOOLS = [
+    ToolInfo(
+        name="execute_select_sql_query",
+        description="Executes a validated SELECT SQL query on the connected SQLite database.",
+        parameters={
+            "type": "object",
+            "properties": {
+                "sql_query": {
+                    "type": "string",
+                    "description": "The SQL SELECT query to execute.",
+                }
+            },
+            "required": ["sql_query"],
+        },
+    )
+]
+TOOLS_MANIFEST = json.dumps(jsonable_encoder(TOOLS)).encode("utf-8")
+TOOLS_ETAG = f'"{hashlib.sha256(TOOLS_MANIFEST).hexdigest()}"'
+TOOLS_HEADERS = {
+    "ETag": TOOLS_ETAG,
+    "Cache-Control": f"public, max-age={TOOLS_CACHE_MAX_AGE}",
+}
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison: "*" or any listed tag, ignoring weak prefixes."""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
 @app.get("/tools", response_model=List[ToolInfo], summary="Discover available tools")
-async def get_tools():
+async def get_tools(if_none_match: Optional[str] = Header(default=None)):
     """
     Returns a list of available tools on the server, mimicking tool discovery in MCP.
     Provides tool metadata including required parameters and descriptions.
+    The manifest carries a strong ETag; a matching If-None-Match gets 304 Not Modified.
     """
 
-    tools = [
-        ToolInfo(
-            name="execute_select_sql_query",
-            description="Executes a validated SELECT SQL query on the connected SQLite database.",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "sql_query": {
-                        "type": "string",
-                        "description": "The SQL SELECT query to execute.",
-                    }
-                },
-                "required": ["sql_query"],
-            },
-        )
-    ]
-    return tools
+    if if_none_match and _etag_matches(if_none_match, TOOLS_ETAG):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=TOOLS_HEADERS)
+    return Response(
+        content=TOOLS_MANIFEST, media_type="application/json", headers=TOOLS_HEADERS
+    )
 
 
-@app.post("/execute_select_sql_query", summary="Execute a SELECT SQL query")
-async def execute_select_sql_query(request: SQLQueryRequest):
-    """
-    Executes a given SQL query on the SQLite database, but only if it's a SELECT query.
-    Validates query type, executes it, and returns results as JSON.
-    """
+def _query_fingerprint(query: str) -> str:
+    # Over the normalized text, like the result cache key: a cached body's token
+    # must stay valid for every spelling that shares the cache entry
+    return hashlib.sha256(normalize_sql(query).encode("utf-8")).hexdigest()[:16]
+
 
-    query = request.sql_query.strip()
+def _encode_page_token(query: str, offset: int) -> str:
+    """Opaque continuation token; only valid for the query it was issued for."""
+    payload = json.dumps({"query": _query_fingerprint(query), "offset": offset})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_page_token(query: str, token: str) -> int:
+    """Returns the row offset encoded in a continuation token."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        offset = int(payload["offset"])
+        fingerprint = payload["query"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Malformed page_token.") from e
+    if fingerprint != _query_fingerprint(query) or offset < 0:
+        raise ValueError("page_token was not issued for this query.")
+    return offset
+
+
+def _validated_query(sql_query: str) -> str:
+    query = sql_query.strip()
 
     # Validate if it's a SELECT query (case-insensitive, ignores leading whitespace)
-    if not re.match(r"^\s*SELECT", query, re.IGNORECASE):
+    if not analyze_sql(query).is_select:
         logging.error(
             f"SQLite {HTTPStatus.BAD_REQUEST}/case-insensitive, ignores leading whitespace"
         )
@@ -95,17 +183,289 @@ async def execute_select_sql_query(request: SQLQueryRequest):
             status_code=HTTPStatus.BAD_REQUEST,
             detail="Only SELECT queries are allowed for execution via this tool.",
         )
+    return query
+
 
-    conn = None
+def _page_request(query: str, request: SQLQueryRequest) -> Optional[tuple[int, int]]:
+    """Returns (page_size, offset) if the client asked for a page, else None."""
+    if request.page_size is None and request.page_token is None:
+        return None
+
+    page_size = DEFAULT_PAGE_SIZE if request.page_size is None else request.page_size
+    if not 0 < page_size <= MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"page_size must be between 1 and {MAX_PAGE_SIZE}.",
+        )
     try:
-        # get_db_connection will attempt to connect to the DB_PATH
-        conn = get_db_connection()
-        results, col_names = execute_query(conn, query)
+        offset = _decode_page_token(query, request.page_token) if request.page_token else 0
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e)) from e
+    return page_size, offset
+
+
+def _budget(conn):
+    return query_guard.budget(conn) if QUERY_GUARD_ENABLED else nullcontext()
+
+
+def _fetch(conn, query: str, page: Optional[tuple[int, int]] = None):
+    """
+    Runs the query behind the guards: plan cost pre-check, VM instruction/time
+    budget and row cap. Returns (rows, column names, more rows exist).
+    """
+    if QUERY_GUARD_ENABLED:
+        query_guard.check_plan(conn, query)
+    with _budget(conn):
+        if page is None:
+            return execute_query_capped(conn, query)
+        page_size, offset = page
+        return execute_query_capped(
+            conn, paginate_query(query), page_size, (page_size + 1, offset)
+        )
+
+
+def _run_select(
+    query: str, page: Optional[tuple[int, int]], media_type: str
+) -> tuple[Response, int]:
+    """
+    Blocking part of query execution; runs on the bounded query executor.
+    Serialization happens here too, so large results never occupy the event loop.
+    Returns the response and the data version the result was read at.
+    """
+    # Borrow a read-only connection from the shared pool
+    with db_pool.connection() as conn:
+        # One read snapshot, so the version read matches the rows returned
+        conn.execute("BEGIN")
+        data_version = read_data_version(conn, TABLE_NAME)
+        results, col_names, has_more = _fetch(conn, query, page)
+    offset = page[1] if page else 0
+    if page is None and has_more:
+        query_guard.record_row_limit()
+
+    meta = {
+        "status": "success",
+        # Unpaged results stop at MAX_RESULT_ROWS; the token fetches what follows
+        "truncated": page is None and has_more,
+        "next_page_token": (
+            _encode_page_token(query, offset + len(results)) if has_more else None
+        ),
+    }
+    body = encode_result(media_type, results, col_names, meta)
+
+    headers = {}
+    if media_type == ARROW_MEDIA_TYPE:
+        headers[TRUNCATED_HEADER] = "true" if meta["truncated"] else "false"
+        if meta["next_page_token"]:
+            headers[NEXT_PAGE_TOKEN_HEADER] = meta["next_page_token"]
+    return Response(content=body, media_type=media_type, headers=headers), data_version
+
+
+def _run_batch(queries: list[str], media_type: str) -> tuple[bytes, int]:
+    """
+    Runs several SELECTs on one connection inside one read snapshot, so all result
+    sets reflect the same data. Repeated statements (identical up to whitespace and
+    comments; case is significant) are executed only once.
+    Returns the encoded body and the data version it was read at.
+    """
+    with db_pool.connection() as conn:
+        conn.execute("BEGIN")
+        data_version = read_data_version(conn, TABLE_NAME)
+        executed = {}
+        results = []
+        for index, query in enumerate(queries):
+            normalized = normalize_sql(query)
+            if normalized not in executed:
+                try:
+                    rows, col_names, truncated = _fetch(conn, query)
+                except sqlite3.Error as e:
+                    raise type(e)(f"query {index + 1}: {e}") from e
+                if truncated:
+                    query_guard.record_row_limit()
+                # Later spellings reuse this result, so the token is bound to the
+                # normalized text they all share rather than to this spelling
+                meta = {
+                    "status": "success",
+                    "truncated": truncated,
+                    "next_page_token": (
+                        _encode_page_token(normalized, len(rows)) if truncated else None
+                    ),
+                }
+                executed[normalized] = result_payload(media_type, rows, col_names, meta)
+            results.append(executed[normalized])
+
+    body = json.dumps(
+        {"status": "success", "results": results}, default=json_default
+    ).encode("utf-8")
+    return body, data_version
+
+
+def _open_stream(query: str):
+    """
+    Executes the query and returns (stack, cursor, budget) for a _RowStream; the
+    stack holds the pooled connection and budget until the stream is closed.
+    """
+    stack = ExitStack()
+    try:
+        conn = stack.enter_context(db_pool.connection())
+        if QUERY_GUARD_ENABLED:
+            query_guard.check_plan(conn, query)
+        # The budget stays installed for the whole stream, since rows are fetched
+        # as it is sent, but it only runs while _budgeted_fetch is inside SQLite
+        budget = stack.enter_context(_budget(conn))
+        cursor = conn.execute(query)
+        if budget is not None:
+            budget.pause()
+    except Exception:
+        stack.close()
+        raise
+    return stack, cursor, budget
+
+
+def _budgeted_fetch(budget, fetch, *args):
+    """Calls a cursor fetch method, counting only the time inside it against the budget."""
+    if budget is None:
+        return fetch(*args)
+    budget.resume()
+    try:
+        return fetch(*args)
+    finally:
+        budget.pause()
+
+
+class _RowStream:
+    """
+    A query being streamed: the cursor and budget from _open_stream, the stack
+    holding its pooled connection and the executor slot its fetches run under.
+    A fetch abandoned by a disconnect may still be running on a worker thread
+    when close() is called, so both take the same lock.
+    """
+
+    def __init__(self, slot, stack: ExitStack, cursor, budget):
+        self.slot = slot
+        self.cursor = cursor
+        self.budget = budget
+        self.succeeded = False
+        self._stack = stack
+        self._lock = threading.Lock()
+
+    def fetchmany(self, size: int) -> list:
+        with self._lock:
+            return _budgeted_fetch(self.budget, self.cursor.fetchmany, size)
+
+    def fetchone(self):
+        with self._lock:
+            return _budgeted_fetch(self.budget, self.cursor.fetchone)
+
+    def close(self):
+        """Returns the connection to the pool and releases the slot; idempotent."""
+        with self._lock:
+            try:
+                self._stack.close()
+            finally:
+                self.slot.release(self.succeeded)
+
+
+class _NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams a _RowStream as NDJSON and closes it once the response is over,
+    however it ends: the body generator never runs at all if the client
+    disconnects before the first chunk, so it cannot own the cleanup.
+    """
+
+    def __init__(self, stream: _RowStream):
+        super().__init__(_ndjson_lines(stream), media_type="application/x-ndjson")
+        self._stream = stream
 
-        # Convert sqlite3.Row objects to dictionaries for JSON serialization
-        formatted_results = [dict(row) for row in results]
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self._stream.slot.run(self._stream.close)
 
-        return {"status": "success", "data": formatted_results, "columns": col_names}
+
+async def _ndjson_lines(stream: _RowStream):
+    """
+    Yields a {"columns": [...]} header, one JSON array per row (flushed in
+    STREAM_FETCH_SIZE batches) and a final {"status": ...} trailer line.
+    Fetches run on the query executor under the stream's slot, which is held
+    until the response ends, so streams count against the executor's
+    concurrency and queue.
+    """
+    cursor, budget = stream.cursor, stream.budget
+    yield json.dumps({"columns": [desc[0] for desc in cursor.description]}) + "\n"
+    sent = 0
+    try:
+        while sent < MAX_RESULT_ROWS:
+            batch = await stream.slot.run(
+                stream.fetchmany, min(STREAM_FETCH_SIZE, MAX_RESULT_ROWS - sent)
+            )
+            if not batch:
+                break
+            sent += len(batch)
+            yield "".join(
+                json.dumps(tuple(row), default=json_default) + "\n" for row in batch
+            )
+        truncated = (
+            sent == MAX_RESULT_ROWS
+            and await stream.slot.run(stream.fetchone) is not None
+        )
+        if truncated:
+            query_guard.record_row_limit()
+
+    # Headers are already sent, so errors are reported in the trailer
+    except sqlite3.Error as e:
+        if budget is not None and budget.tripped:
+            rejection = budget.rejection()
+            logging.error(f"Query stopped while streaming: {rejection}")
+            yield json.dumps({"status": "error", "detail": rejection.to_detail()}) + "\n"
+            return
+        logging.error(f"SQLite error while streaming: {e}")
+        yield json.dumps({"status": "error", "detail": f"Database error: {e}."}) + "\n"
+        return
+    except Exception as e:
+        logging.error(f"Unexpected error while streaming: {e}")
+        yield json.dumps(
+            {"status": "error", "detail": f"An unexpected error occurred: {e}"}
+        ) + "\n"
+        return
+
+    yield json.dumps(
+        {"status": "success", "row_count": sent, "truncated": truncated}
+    ) + "\n"
+    stream.succeeded = True
+
+
+def _server_busy(e: QueueFullError) -> HTTPException:
+    logging.error(f"SQLite {HTTPStatus.SERVICE_UNAVAILABLE}/query queue full")
+    return HTTPException(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        detail=f"Server is busy: {e} Please retry shortly.",
+        headers={"Retry-After": str(QUERY_RETRY_AFTER_SECONDS)},
+    )
+
+
+async def _execute(fn, *args, slot=None):
+    """
+    Runs blocking query work on the executor, mapping failures to HTTP errors.
+    With `slot` the work runs under that already reserved place.
+    """
+    try:
+        # SQLite calls block, so they run off the event loop
+        if slot is not None:
+            return await slot.run(fn, *args)
+        return await query_executor.run(fn, *args)
+
+    # Shed load instead of queueing without bound
+    except QueueFullError as e:
+        raise _server_busy(e) from e
+
+    # Report guard rejections as structured errors the client can surface
+    except QueryRejected as e:
+        logging.error(f"SQLite {HTTPStatus.UNPROCESSABLE_ENTITY}/{e.guard} guard: {e}")
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=e.to_detail()
+        ) from e
 
     # Handle SQLite-related issues (e.g., invalid query, file not found)
     except sqlite3.Error as e:
@@ -126,10 +486,146 @@ async def execute_select_sql_query(request: SQLQueryRequest):
             detail=f"An unexpected error occurred: {e}",
         ) from e
 
-    # Always close the DB connection after use
-    finally:
-        if conn:
-            conn.close()
+
+@app.post("/execute_select_sql_query", summary="Execute a SELECT SQL query")
+async def execute_select_sql_query(
+    request: SQLQueryRequest, accept: Optional[str] = Header(default=None)
+):
+    """
+    Executes a given SQL query on the SQLite database, but only if it's a SELECT query.
+    Validates query type, executes it, and returns results as JSON.
+    At most MAX_RESULT_ROWS rows are returned (`truncated` is set when more exist);
+    with `page_size`/`page_token` one page is returned plus a `next_page_token`.
+
+    The Accept header selects the encoding: row dicts (application/json, default),
+    column -> values arrays (application/vnd.genbi.columnar+json) or Arrow IPC
+    (application/vnd.apache.arrow.stream, when pyarrow is installed).
+    """
+
+    media_type = negotiate(accept)
+    if media_type is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_ACCEPTABLE,
+            detail=f"Supported result encodings: {', '.join(supported_media_types())}.",
+        )
+
+    query = _validated_query(request.sql_query)
+    page = _page_request(query, request)
+
+    # Identical queries on unchanged data are answered from the result cache
+    version = result_cache.current_version() if RESULT_CACHE_ENABLED else None
+    if version is not None:
+        key = result_cache.key(query, page, media_type, version)
+        cached = result_cache.get(key)
+        if cached is not None:
+            body, headers = cached
+            return Response(content=body, media_type=media_type, headers=headers)
+
+    response, data_version = await _execute(_run_select, query, page, media_type)
+    if version is not None and data_version == version:
+        headers = {
+            name: response.headers[name]
+            for name in (TRUNCATED_HEADER, NEXT_PAGE_TOKEN_HEADER)
+            if name in response.headers
+        }
+        result_cache.put(key, (response.body, headers), len(response.body))
+    return response
+
+
+@app.post(
+    "/execute_select_sql_queries",
+    summary="Execute several SELECT SQL queries in one round trip",
+)
+async def execute_select_sql_queries(
+    request: SQLBatchRequest, accept: Optional[str] = Header(default=None)
+):
+    """
+    Executes up to MAX_BATCH_QUERIES SELECT queries on one connection and snapshot
+    and returns {"status": ..., "results": [...]}, one result per query in order,
+    each shaped like a /execute_select_sql_query response. Supports the row
+    (default) and columnar JSON encodings.
+    """
+
+    media_type = negotiate(accept, JSON_MEDIA_TYPES)
+    if media_type is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_ACCEPTABLE,
+            detail=f"Supported result encodings: {', '.join(JSON_MEDIA_TYPES)}.",
+        )
+    if not 0 < len(request.sql_queries) <= MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"Send between 1 and {MAX_BATCH_QUERIES} queries per batch.",
+        )
+    queries = [_validated_query(sql_query) for sql_query in request.sql_queries]
+
+    version = result_cache.current_version() if RESULT_CACHE_ENABLED else None
+    if version is not None:
+        key = result_cache.batch_key(queries, media_type, version)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return Response(content=cached, media_type=media_type)
+
+    body, data_version = await _execute(_run_batch, queries, media_type)
+    if version is not None and data_version == version:
+        result_cache.put(key, body, len(body))
+    return Response(content=body, media_type=media_type)
+
+
+@app.post(
+    "/execute_select_sql_query/stream",
+    summary="Execute a SELECT SQL query and stream rows as NDJSON",
+)
+async def stream_select_sql_query(request: SQLQueryRequest):
+    """
+    Executes a SELECT query and streams its rows as newline-delimited JSON, so
+    neither side holds the full result. Capped at MAX_RESULT_ROWS rows.
+    """
+
+    query = _validated_query(request.sql_query)
+    try:
+        slot = query_executor.reserve()
+    except QueueFullError as e:
+        raise _server_busy(e) from e
+    try:
+        stack, cursor, budget = await _execute(_open_stream, query, slot=slot)
+    except BaseException:
+        slot.release(succeeded=False)
+        raise
+    return _NDJSONStreamingResponse(_RowStream(slot, stack, cursor, budget))
+
+
+@app.get("/metrics/pool", summary="Database connection pool metrics")
+async def get_pool_metrics():
+    """
+    Returns connection pool counters: connections created/closed, in use and idle,
+    checkouts, timeouts, health check failures and time spent waiting for a slot.
+    """
+    return db_pool.metrics()
+
+
+@app.get("/metrics/executor", summary="Query executor metrics")
+async def get_executor_metrics():
+    """Returns running/queued query count, completed queries and 503 rejections."""
+    return query_executor.metrics()
+
+
+@app.get("/metrics/query_guard", summary="Query guard metrics")
+async def get_query_guard_metrics():
+    """
+    Returns how often each guard tripped (plan cost, VM instruction budget, time
+    budget, row limit), the number of plans checked and the configured limits.
+    """
+    return query_guard.metrics()
+
+
+@app.get("/metrics/result_cache", summary="Query result cache metrics")
+async def get_result_cache_metrics():
+    """
+    Returns result cache counters (hits, misses, evictions, invalidations, results
+    too large to cache), its size in entries and bytes, and the data version served.
+    """
+    return result_cache.metrics()
 
 
 # Entry point when script is run directly
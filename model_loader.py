@@ -1,25 +1,45 @@
+import hashlib
+import threading
+import weakref
 import torch
-from config import MODEL_NAME
-from transformers import AutoTokenizer, AutoModelForCausalLM
-import streamlit as st
+from config import MODEL_NAME, MODEL_PRECISION, MAX_RESIDENT_MODELS
+from transformers import AutoTokenizer, AutoModelForCausalLM, DynamicCache
+from model_registry import ModelRegistry
 
+# Precomputed system prompt KV caches, stored per loaded model so they are dropped with it
+_prompt_caches = weakref.WeakKeyDictionary()
+_prompt_cache_lock = threading.Lock()
 
-@st.cache_resource  # Add this decorator to cache the loaded model and tokenizer
-def load_model(model_name=MODEL_NAME):
+SUPPORTED_PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def _load_from_pretrained(model_name, precision):
     """
     Loads the Hugging Face tokenizer and model.
-    Uses st.cache_resource to cache the model, loading it only once across Streamlit reruns.
+    On CPU the weights are loaded in the requested precision ("fp32", "bf16" or "int8");
+    the mode actually in use is recorded on the model as `precision_mode`.
     """
-    print(f"Loading model '{model_name}' (this should happen only once)...")
+    if precision not in SUPPORTED_PRECISIONS:
+        raise ValueError(
+            f"Unsupported MODEL_PRECISION '{precision}'. "
+            f"Choose one of: {', '.join(SUPPORTED_PRECISIONS)}."
+        )
+
+    print(
+        f"Loading model '{model_name}' in {precision} (this should happen only once)..."
+    )
 
         # Load the tokenizer for the specified model
     tokenizer = AutoTokenizer.from_pretrained(model_name)
 
         # Load the model with appropriate tensor type depending on device availability
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-    )
+    if torch.cuda.is_available():
+        torch_dtype, precision = torch.float16, "fp16"
+    elif precision == "bf16":
+        torch_dtype = torch.bfloat16
+    else:
+        torch_dtype = torch.float32
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch_dtype)
 
         # Set model to evaluation mode
     model.eval()
@@ -27,4 +47,70 @@ def load_model(model_name=MODEL_NAME):
         # Move model to GPU if available, otherwise keep on CPU
     if torch.cuda.is_available():
         model.to("cuda")
+    elif precision == "int8":
+        # Dynamic quantization: int8 weights, activations quantized on the fly per batch
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    model.precision_mode = precision
     return tokenizer, model
+
+
+# Shared by Streamlit sessions, batch jobs and API workers in the same process
+registry = ModelRegistry(_load_from_pretrained, max_resident=MAX_RESIDENT_MODELS)
+
+
+def load_model(model_name=MODEL_NAME, precision=MODEL_PRECISION):
+    """
+    Returns the (tokenizer, model) pair from the process-wide registry,
+    loading it only once no matter which framework is calling.
+    """
+    return registry.get(model_name, precision)
+
+
+def warmup_model(model_name=MODEL_NAME, precision=MODEL_PRECISION):
+    """Loads the model ahead of the first request."""
+    return registry.warmup(model_name, precision)
+
+
+def unload_model(model_name=None, precision=None):
+    """
+    Frees one resident model, every precision of `model_name` when no precision is
+    given, or all of them when no name is given.
+    """
+    return registry.unload(model_name, precision)
+
+
+def get_prompt_cache(tokenizer, model, system_prompt: str):
+    """
+    Returns (prefix_ids, past_key_values) for the chat-templated system prompt.
+    The prefill runs once per model and prompt text; a changed prompt or a newly
+    loaded model transparently triggers a recompute.
+    """
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+    with _prompt_cache_lock:
+        cached = _prompt_caches.get(model)
+        if cached and cached[0] == prompt_hash:
+            return cached[1], cached[2]
+
+        prefix_ids = tokenizer.apply_chat_template(
+            [{"role": "system", "content": system_prompt}],
+            add_generation_prompt=False,
+            tokenize=True,
+            return_tensors="pt",
+        ).to("cpu")
+
+        # Mask the same way generate_sql_query does so reused entries match a full prefill
+        attention_mask = (prefix_ids != tokenizer.pad_token_id).long()
+        with torch.no_grad():
+            past_key_values = model(
+                input_ids=prefix_ids,
+                attention_mask=attention_mask,
+                past_key_values=DynamicCache(),
+                use_cache=True,
+            ).past_key_values
+
+        _prompt_caches[model] = (prompt_hash, prefix_ids, past_key_values)
+        return prefix_ids, past_key_values
@@ -0,0 +1,83 @@
+import gc
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("model_registry")
+logger.setLevel(logging.INFO)
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of loaded (tokenizer, model) pairs.
+    Models are loaded lazily on first use, at most `max_resident` stay in memory,
+    and the least recently used one is unloaded when that limit is exceeded.
+    """
+
+    def __init__(self, loader, max_resident=1):
+        # loader(model_name, precision) -> (tokenizer, model)
+        self._loader = loader
+        self._max_resident = max(1, max_resident)
+        self._models = OrderedDict()  # (model_name, precision) -> (tokenizer, model)
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name, precision):
+        """Returns the loaded pair for the key, loading it if it is not resident."""
+        key = (model_name, precision)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Loading takes seconds, so only callers of the same key wait on each other
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+
+            loaded = self._loader(model_name, precision)
+
+            with self._lock:
+                self._models[key] = loaded
+                self._load_locks.pop(key, None)
+                evicted = []
+                while len(self._models) > self._max_resident:
+                    evicted.append(self._models.popitem(last=False)[0])
+
+        for evicted_key in evicted:
+            logger.info("Unloaded model %s (%s) to stay within limit.", *evicted_key)
+        if evicted:
+            gc.collect()
+        return loaded
+
+    def warmup(self, model_name, precision):
+        """Loads the model ahead of the first request."""
+        return self.get(model_name, precision)
+
+    def unload(self, model_name=None, precision=None):
+        """
+        Drops resident models: every one when no name is given, every precision of
+        the name when no precision is given, otherwise just that (name, precision).
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._models
+                if model_name is None
+                or (key[0] == model_name and precision in (None, key[1]))
+            ]
+            for key in keys:
+                del self._models[key]
+
+        for key in keys:
+            logger.info("Unloaded model %s (%s).", *key)
+        gc.collect()
+        return len(keys)
+
+    def loaded(self) -> list[tuple[str, str]]:
+        """Returns the resident (model_name, precision) keys, least recently used first."""
+        with self._lock:
+            return list(self._models)
@@ -0,0 +1,160 @@
+import re
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from config import (
+    DB_PATH,
+    TABLE_NAME,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_MAX_ENTRY_BYTES,
+)
+from db_loader import read_data_version
+
+logger = logging.getLogger("result_cache")
+logger.setLevel(logging.INFO)
+
+# String literals, quoted identifiers and comments, which whitespace collapsing must
+# not reach into (a comment runs to the end of its line)
+_QUOTED_RE = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*[\s\S]*?(?:\*/|\Z))"""
+)
+
+
+def normalize_sql(sql_query: str) -> str:
+    """
+    Drops comments and a trailing semicolon and collapses whitespace outside quoted
+    text, so trivially different spellings of a query share a cache entry. Case is
+    kept: it decides result column labels ("AS P" vs "AS p", "SUM(x)" vs "sum(x)").
+    """
+    parts = _QUOTED_RE.split(sql_query)
+    for i in range(1, len(parts), 2):
+        if parts[i].startswith(("--", "/*")):
+            parts[i] = " "  # A comment separates tokens like whitespace does
+    parts = _QUOTED_RE.split("".join(parts).strip().rstrip(";"))
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i])
+    return "".join(parts).strip()
+
+
+class ResultCache:
+    """
+    In-memory cache of encoded query results, keyed by normalized SQL, page,
+    encoding and the table's data version. Entries are evicted least recently
+    used first once their total size exceeds `max_bytes`; results larger than
+    `max_entry_bytes` are not cached. A new data version (any re-ingest, from any
+    process) clears the cache, so stale results are never served.
+    """
+
+    def __init__(
+        self,
+        db_path=DB_PATH,
+        table_name=TABLE_NAME,
+        max_bytes=RESULT_CACHE_MAX_BYTES,
+        max_entry_bytes=RESULT_CACHE_MAX_ENTRY_BYTES,
+    ):
+        self.db_path = db_path
+        self.table_name = table_name
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._conn = None
+        self._sqlite_data_version = None
+        self._version = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "oversized": 0,
+        }
+
+    def current_version(self) -> int | None:
+        """
+        Returns the table's data version, or None if it cannot be read. Like the
+        schema service, it only re-reads it when `PRAGMA data_version` moves.
+        """
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = sqlite3.connect(
+                        f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+                    )
+                sqlite_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if sqlite_version != self._sqlite_data_version:
+                    version = read_data_version(self._conn, self.table_name)
+                    self._sqlite_data_version = sqlite_version
+                    if self._version is not None and version != self._version:
+                        self._clear(f"data version {self._version} -> {version}")
+                    self._version = version
+            except sqlite3.Error as e:
+                logger.warning("Could not read data version, bypassing cache: %s", e)
+                return None
+            return self._version
+
+    @staticmethod
+    def key(sql_query: str, page, media_type: str, version: int) -> tuple:
+        return (normalize_sql(sql_query), page, media_type, version)
+
+    @staticmethod
+    def batch_key(sql_queries: list[str], media_type: str, version: int) -> tuple:
+        return (tuple(normalize_sql(q) for q in sql_queries), "batch", media_type, version)
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: tuple, value, size: int):
+        """Caches `value`, whose encoded size is `size` bytes."""
+        with self._lock:
+            if key[-1] != self._version:
+                return  # Computed against data that has since been replaced
+            if size > self.max_entry_bytes:
+                self.stats["oversized"] += 1
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[0]
+            self._entries[key] = (size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def invalidate(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._clear("explicit invalidation")
+
+    def _clear(self, reason: str):
+        if self._entries:
+            logger.info("Clearing %d cached results (%s).", len(self._entries), reason)
+        self._entries.clear()
+        self._bytes = 0
+        self.stats["invalidations"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot.update(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                max_entry_bytes=self.max_entry_bytes,
+                data_version=self._version,
+            )
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+
+# Shared by every request handled in this process
+result_cache = ResultCache()
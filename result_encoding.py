@@ -0,0 +1,148 @@
+import base64
+import io
+import json
+
+# pyarrow is optional: without it the Arrow encoding is simply not offered
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+ROWS_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.genbi.columnar+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Encodings that can hold several result sets in one body
+JSON_MEDIA_TYPES = (ROWS_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE)
+
+# Response headers carrying metadata that the Arrow body has no room for
+TRUNCATED_HEADER = "X-Result-Truncated"
+NEXT_PAGE_TOKEN_HEADER = "X-Next-Page-Token"
+
+
+def json_default(value):
+    """json.dumps fallback for SQLite values JSON has no type for: BLOBs as base64."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return str(value)
+
+
+def supported_media_types() -> list[str]:
+    """Result encodings this process can produce, in order of preference."""
+    media_types = [ROWS_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE]
+    if pa is not None:
+        media_types.append(ARROW_MEDIA_TYPE)
+    return media_types
+
+
+def negotiate(accept: str | None, supported=None) -> str | None:
+    """
+    Picks the result encoding for an Accept header (highest q first, then header
+    order) among `supported` (default: every encoding available). No header means
+    the row layout; None means nothing acceptable is supported.
+    """
+    if not accept:
+        return ROWS_MEDIA_TYPE
+
+    supported = supported or supported_media_types()
+    ranges = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (p.strip() for p in part.split(";"))
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(ranges):
+        if media_type in supported:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return ROWS_MEDIA_TYPE
+    return None
+
+
+def _arrow_column(values: list):
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # SQLite columns can mix types; fall back to text for such columns
+        return pa.array([None if v is None else str(v) for v in values])
+
+
+def _column_values(rows, columns: list[str]) -> list[list]:
+    return [list(col) for col in zip(*rows)] if rows else [[] for _ in columns]
+
+
+def result_payload(media_type: str, rows, columns: list[str], meta: dict) -> dict:
+    """JSON-ready result in the rows or columnar layout, with `meta` merged in."""
+    if media_type == ROWS_MEDIA_TYPE:
+        payload = dict(meta, data=[dict(zip(columns, row)) for row in rows])
+        payload["columns"] = columns
+        return payload
+
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        values = _column_values(rows, columns)
+        payload = dict(meta, data=dict(zip(columns, values)), columns=columns)
+        payload["row_count"] = len(rows)
+        return payload
+
+    raise ValueError(f"Not a JSON result encoding: {media_type}")
+
+
+def encode_result(media_type: str, rows, columns: list[str], meta: dict) -> bytes:
+    """
+    Serializes rows (sequences in `columns` order) in the given encoding.
+    `meta` (status, truncated, next_page_token, ...) is embedded in the JSON
+    encodings; for Arrow it is left to the caller to send as headers.
+    """
+    if media_type in JSON_MEDIA_TYPES:
+        payload = result_payload(media_type, rows, columns, meta)
+        return json.dumps(payload, default=json_default).encode("utf-8")
+
+    if media_type == ARROW_MEDIA_TYPE:
+        values = _column_values(rows, columns)
+        table = pa.Table.from_arrays(
+            [_arrow_column(column_values) for column_values in values], names=columns
+        )
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+
+    raise ValueError(f"Unsupported result encoding: {media_type}")
+
+
+def decode_dataframe(media_type: str, body: bytes, headers=None):
+    """
+    Decodes a response body in any supported encoding into a pandas DataFrame.
+    `truncated` and `next_page_token` are stored in DataFrame.attrs.
+    """
+    headers = headers or {}
+    media_type = media_type.split(";")[0].strip().lower()
+
+    if media_type == ARROW_MEDIA_TYPE:
+        if pa is None:
+            raise RuntimeError("pyarrow is required to decode Arrow results.")
+        df = pa.ipc.open_stream(body).read_pandas()
+        df.attrs["truncated"] = headers.get(TRUNCATED_HEADER, "false") == "true"
+        df.attrs["next_page_token"] = headers.get(NEXT_PAGE_TOKEN_HEADER)
+        return df
+
+    return payload_dataframe(json.loads(body))
+
+
+def payload_dataframe(payload: dict):
+    """Builds a DataFrame from one decoded JSON result (rows or columnar layout)."""
+    import pandas as pd
+
+    # "data" is a column -> values mapping (columnar) or a list of row dicts (rows)
+    df = pd.DataFrame(payload["data"], columns=payload["columns"])
+    df.attrs["truncated"] = payload.get("truncated", False)
+    df.attrs["next_page_token"] = payload.get("next_page_token")
+    return df
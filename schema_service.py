@@ -0,0 +1,116 @@
+import logging
+import sqlite3
+import threading
+from config import DB_PATH, TABLE_NAME, SCHEMA_SAMPLE_VALUES
+from db_loader import INGEST_META_TABLE
+
+logger = logging.getLogger("schema_service")
+logger.setLevel(logging.INFO)
+
+
+class TableSchema:
+    """Snapshot of a table's columns, sample values and size at one schema version."""
+
+    def __init__(self, table_name, columns, samples, row_count, version):
+        self.table_name = table_name
+        self.columns = columns  # [(name, declared type)] in table order
+        self.samples = samples  # name -> distinct values, for TEXT and REAL columns
+        self.row_count = row_count
+        self.version = version
+
+    @property
+    def column_names(self) -> list[str]:
+        return [name for name, _ in self.columns]
+
+
+class SchemaService:
+    """
+    Reads a table's schema from the database once and serves it from memory.
+    Every lookup checks SQLite's `PRAGMA data_version` on a long-lived connection,
+    which only changes when another connection commits, so repeat lookups cost
+    microseconds; the schema is rebuilt only when its version token changes.
+    """
+
+    def __init__(
+        self, db_path=DB_PATH, table_name=TABLE_NAME, sample_size=SCHEMA_SAMPLE_VALUES
+    ):
+        self.db_path = db_path
+        self.table_name = table_name
+        self.sample_size = sample_size
+        self._conn = None
+        self._data_version = None
+        self._schema = None
+        self._lock = threading.Lock()
+
+    def get_schema(self) -> TableSchema:
+        """Returns the cached schema, refreshing it if the database has changed."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._schema is not None and data_version == self._data_version:
+                return self._schema
+
+            version = self._version_token()
+            if self._schema is None or self._schema.version != version:
+                self._schema = self._introspect(version)
+                logger.info(
+                    "Loaded schema of '%s' (%d columns, %d rows).",
+                    self.table_name,
+                    len(self._schema.columns),
+                    self._schema.row_count,
+                )
+            self._data_version = data_version
+            return self._schema
+
+    def invalidate(self):
+        """Forces the next lookup to re-read the schema."""
+        with self._lock:
+            self._schema = None
+
+    def _version_token(self) -> tuple:
+        schema_version = self._conn.execute("PRAGMA schema_version").fetchone()[0]
+        try:
+            ingest = self._conn.execute(
+                f"SELECT sha256, ingested_at FROM {INGEST_META_TABLE} "
+                "WHERE table_name = ?",
+                (self.table_name,),
+            ).fetchone()
+        except sqlite3.OperationalError:
+            ingest = None  # Database not loaded through db_loader yet
+        return (schema_version, ingest)
+
+    def _introspect(self, version) -> TableSchema:
+        columns = [
+            (row[1], row[2] or "TEXT")
+            for row in self._conn.execute(f"PRAGMA table_info({self.table_name})")
+        ]
+        if not columns:
+            raise LookupError(
+                f"Table '{self.table_name}' not found in database '{self.db_path}'."
+            )
+
+        samples = {}
+        for name, declared_type in columns:
+            if declared_type.upper() in ("TEXT", "REAL"):
+                samples[name] = [
+                    row[0]
+                    for row in self._conn.execute(
+                        f'SELECT DISTINCT "{name}" FROM {self.table_name} '
+                        f'WHERE "{name}" IS NOT NULL ORDER BY "{name}" DESC LIMIT ?',
+                        (self.sample_size,),
+                    )
+                ]
+        row_count = self._conn.execute(
+            f"SELECT COUNT(*) FROM {self.table_name}"
+        ).fetchone()[0]
+        return TableSchema(self.table_name, columns, samples, row_count, version)
+
+
+schema_service = SchemaService()
+
+
+def get_table_schema() -> TableSchema:
+    """Schema of TABLE_NAME from the process-wide SchemaService."""
+    return schema_service.get_schema()
@@ -0,0 +1,148 @@
+import logging
+import re
+import threading
+import numpy as np
+from config import EMBEDDING_MODEL_NAME
+from intent_config import PATTERN_CONFIG
+from agents.intent_generator import extract_entities, unextracted_values
+from model_registry import ModelRegistry
+
+logger = logging.getLogger("semantic_cache")
+logger.setLevel(logging.INFO)
+
+
+def _load_encoder(model_name, _precision):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+# One encoder per process, shared by every session's cache
+_encoders = ModelRegistry(_load_encoder, max_resident=1)
+
+
+def encode_questions(questions: list[str]) -> np.ndarray:
+    """Returns L2-normalized float32 embeddings, one row per question."""
+    encoder = _encoders.get(EMBEDDING_MODEL_NAME, "fp32")
+    return encoder.encode(
+        questions, normalize_embeddings=True, convert_to_numpy=True
+    ).astype(np.float32)
+
+
+# Wording that changes the shape of the SQL without changing the entities
+_AGGREGATIONS = {
+    "SUM": re.compile(r"\b(?:total|sum)\b", re.IGNORECASE),
+    "AVG": re.compile(r"\b(?:average|avg|mean)\b", re.IGNORECASE),
+    "COUNT": re.compile(r"\b(?:count|how many|number of)\b", re.IGNORECASE),
+    "MAX": re.compile(r"\b(?:max(?:imum)?|highest|most)\b", re.IGNORECASE),
+    "MIN": re.compile(r"\b(?:min(?:imum)?|lowest|least)\b", re.IGNORECASE),
+    "GROUP": re.compile(r"\b(?:per|each|by)\b", re.IGNORECASE),
+}
+# Negation and range wording: "excluding platform c-6kv" and "after release 7.2"
+# share their entities with "for platform c-6kv" and "for release 7.2"
+_QUALIFIERS = {
+    "NOT": re.compile(
+        r"\b(?:not|no|except|exclud(?:e|es|ing)|without|other than|apart from|besides)\b"
+        r"|n't\b",
+        re.IGNORECASE,
+    ),
+    "AFTER": re.compile(
+        r"\b(?:after|since|newer|later|above|over|greater|more than)\b",
+        re.IGNORECASE,
+    ),
+    "BEFORE": re.compile(
+        r"\b(?:before|until|till|up to|prior|older|earlier|below|under|less than)\b",
+        re.IGNORECASE,
+    ),
+    "BETWEEN": re.compile(r"\b(?:between|range)\b", re.IGNORECASE),
+    "ONLY": re.compile(r"\b(?:only|just|exclusively)\b", re.IGNORECASE),
+    "OR": re.compile(r"\b(?:or|either)\b", re.IGNORECASE),
+}
+
+
+def entity_key(question: str) -> str | None:
+    """
+    Canonical form of the entities in a question. Filter values must match exactly,
+    metrics only by which ones were asked for, so 'sn1' never matches 'sn2'; the
+    aggregations and negation/range qualifiers asked for are part of the key too, so
+    'total passed' never matches 'passed' and 'excluding c-6kv' never matches
+    'for c-6kv'. None when some value was not extracted: such questions are not cached.
+    """
+    entities = extract_entities(question)
+    if unextracted_values(question, entities):
+        return None
+    parts = []
+    for key, value in entities.items():
+        if PATTERN_CONFIG[key].get("is_metric", False):
+            parts.append(key)
+        else:
+            parts.append(f"{key}={value.rstrip('.').lower()}")
+    parts.extend(name for name, pattern in _AGGREGATIONS.items() if pattern.search(question))
+    parts.extend(name for name, pattern in _QUALIFIERS.items() if pattern.search(question))
+    return "|".join(parts)
+
+
+class SemanticQuestionCache:
+    """
+    Fixed-capacity ring buffer of question embeddings kept in one contiguous matrix.
+    A lookup is a single matrix-vector product over the entries whose entities match.
+    """
+
+    def __init__(self, capacity: int, threshold: float, encode=encode_questions):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._encode = encode
+        self._vectors = None  # (capacity, dim), allocated on the first insert
+        self._keys = np.empty(capacity, dtype=object)
+        self._sqls = [None] * capacity
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def get_sql_for_question(self, question: str) -> str | None:
+        """Returns the SQL of the most similar stored question above the threshold."""
+        with self._lock:
+            if self._size == 0:
+                return None
+
+        key = entity_key(question)
+        if key is None:
+            return None
+        vector = self._encode([question])[0]
+
+        with self._lock:
+            candidates = np.flatnonzero(self._keys[: self._size] == key)
+            if len(candidates) == 0:
+                return None
+            # Rows are normalized, so the dot product is the cosine similarity
+            scores = self._vectors[candidates] @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                logger.info(
+                    "Closest cached question scored %.3f, below %.2f.",
+                    scores[best],
+                    self.threshold,
+                )
+                return None
+            logger.info("Semantic cache hit (similarity %.3f).", scores[best])
+            return self._sqls[candidates[best]]
+
+    def add_question_answer(self, question: str, sql: str):
+        """
+        Stores the question's embedding, overwriting the oldest entry when full.
+        Questions without a reliable entity key are skipped.
+        """
+        key = entity_key(question)
+        if key is None:
+            return
+        vector = self._encode([question])[0]
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+            slot = self._next
+            self._vectors[slot] = vector
+            self._keys[slot] = key
+            self._sqls[slot] = sql
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from config import (
+    SQL_CACHE_PATH,
+    SQL_CACHE_MAX_ENTRIES,
+    SQL_CACHE_TTL_SECONDS,
+    SQL_CACHE_PURGE_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger("sql_cache")
+logger.setLevel(logging.INFO)
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases, collapses whitespace and drops trailing punctuation."""
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+def cache_key(question: str, model_name: str, prompt_version: str) -> str:
+    """Hash of everything the generated SQL depends on."""
+    raw = "\0".join([normalize_question(question), model_name, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SQLCache:
+    """
+    SQL cache persisted in a local SQLite file and shared across sessions,
+    processes and restarts. Lookups go through the hashed primary key; entries
+    expire after `ttl_seconds` and the least recently used ones are evicted once
+    more than `max_entries` are stored. Expired rows are purged in bulk every
+    `purge_interval` seconds (lookups already treat them as misses), and the row
+    count is tracked in memory, so a put costs a few index operations.
+    """
+
+    def __init__(
+        self,
+        path=SQL_CACHE_PATH,
+        max_entries=SQL_CACHE_MAX_ENTRIES,
+        ttl_seconds=SQL_CACHE_TTL_SECONDS,
+        purge_interval=SQL_CACHE_PURGE_INTERVAL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._lock = threading.Lock()
+        # Autocommit; every statement below is its own short transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sql_cache (
+                key TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sql_cache_last_access "
+            "ON sql_cache (last_access)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sql_cache_created_at "
+            "ON sql_cache (created_at)"
+        )
+        self._count = 0
+        self._next_purge = 0.0
+        with self._lock:
+            self._purge_expired(time.time())
+
+    def get(self, question: str, model_name: str, prompt_version: str) -> str | None:
+        """Returns the cached SQL, refreshing its recency, or None on a miss."""
+        key = cache_key(question, model_name, prompt_version)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sql, created_at FROM sql_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            sql, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM sql_cache WHERE key = ?", (key,))
+                self._count -= 1
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE sql_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self.stats["hits"] += 1
+            return sql
+
+    def put(self, question: str, sql: str, model_name: str, prompt_version: str):
+        """Stores the SQL and evicts the least recently used entries beyond the limit."""
+        key = cache_key(question, model_name, prompt_version)
+        now = time.time()
+        with self._lock:
+            if now >= self._next_purge:
+                self._purge_expired(now)
+
+            exists = self._conn.execute(
+                "SELECT 1 FROM sql_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO sql_cache
+                    (key, question, sql, model_name, prompt_version, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    -- Re-adding the same answer must not extend its TTL
+                    created_at = CASE WHEN sql_cache.sql = excluded.sql
+                        THEN sql_cache.created_at ELSE excluded.created_at END,
+                    sql = excluded.sql,
+                    last_access = excluded.last_access
+                """,
+                (key, question, sql, model_name, prompt_version, now, now),
+            )
+            if not exists:
+                self._count += 1
+
+            overflow = self._count - self.max_entries
+            if overflow > 0:
+                evicted = self._conn.execute(
+                    """
+                    DELETE FROM sql_cache WHERE key IN (
+                        SELECT key FROM sql_cache ORDER BY last_access LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                ).rowcount
+                self._count -= evicted
+                self.stats["evictions"] += evicted
+                logger.info("Evicted %d least recently used SQL cache entries.", evicted)
+
+    def _purge_expired(self, now: float):
+        """
+        Deletes expired rows through the created_at index and resyncs the row
+        count, which other processes sharing the file may have changed.
+        """
+        expired = self._conn.execute(
+            "DELETE FROM sql_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        self.stats["expirations"] += expired
+        self._count = self._conn.execute("SELECT COUNT(*) FROM sql_cache").fetchone()[0]
+        self._next_purge = now + self.purge_interval
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_sql_cache() -> SQLCache:
+    """Returns the process-wide SQLCache, opening it on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SQLCache()
+        return _shared_cache
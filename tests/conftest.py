@@ -0,0 +1,43 @@
+"""Shared fixtures; run the suite from the repository root with `python -m pytest`."""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# config prompts on stdin for a missing server URL
+os.environ.setdefault("MCP_SERVER_URL", "http://127.0.0.1:8000")
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """
+    mcp_server imported in a scratch directory, so the database it builds from a
+    copy of the sample CSV never touches the checkout (DB_PATH is relative).
+    """
+    pytest.importorskip("fastapi")
+    pytest.importorskip("pandas")
+    from config import CSV_PATH
+
+    workdir = tmp_path_factory.mktemp("mcp_server")
+    shutil.copy(os.path.join(ROOT, CSV_PATH), workdir)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import mcp_server
+
+        yield mcp_server
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def client(server):
+    from fastapi.testclient import TestClient
+
+    return TestClient(server.app)
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import db_loader
+from db_loader import load_csv_to_sqlite
+
+HEADER = "platform,test_suite,release_version,testcases_passed\n"
+
+
+def _rows(start: int, count: int) -> str:
+    return "".join(f"p{i % 3},sn{i},7.10,{i}\n" for i in range(start, start + count))
+
+
+def _count(db_path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0]
+
+
+@pytest.fixture
+def source(tmp_path):
+    csv_path = tmp_path / "results.csv"
+    csv_path.write_text(HEADER + _rows(0, 2000))
+    db_path = tmp_path / "results.db"
+    conn, _ = load_csv_to_sqlite(str(csv_path), "test_results", str(db_path))
+    conn.close()
+    return csv_path, db_path
+
+
+def _append(csv_path, rows: str):
+    with open(csv_path, "a") as f:
+        f.write(rows)
+
+
+def test_concurrent_loads_append_the_tail_once(source):
+    csv_path, db_path = source
+    _append(csv_path, _rows(2000, 15))
+
+    errors = []
+
+    def load():
+        conn, _ = load_csv_to_sqlite(str(csv_path), "test_results", str(db_path))
+        if conn is None:
+            errors.append("load failed")
+        else:
+            conn.close()
+
+    threads = [threading.Thread(target=load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert _count(db_path) == 2015
+
+
+def test_load_dying_before_fingerprint_keeps_table_unchanged(source, monkeypatch):
+    csv_path, db_path = source
+    _append(csv_path, _rows(2000, 15))
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt  # Not handled by the loader, like a killed process
+
+    with monkeypatch.context() as patched:
+        patched.setattr(db_loader, "_write_fingerprint", crash)
+        with pytest.raises(KeyboardInterrupt):
+            load_csv_to_sqlite(str(csv_path), "test_results", str(db_path))
+    assert _count(db_path) == 2000
+
+    conn, _ = load_csv_to_sqlite(str(csv_path), "test_results", str(db_path))
+    conn.close()
+    assert _count(db_path) == 2015
+
+
+def test_release_versions_stay_text(source):
+    _, db_path = source
+    with sqlite3.connect(db_path) as conn:
+        versions = {row[0] for row in conn.execute("SELECT release_version FROM test_results")}
+    assert versions == {"7.10"}
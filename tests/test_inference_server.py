@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from fastapi.testclient import TestClient
+
+from config import INFERENCE_REQUEST_TIMEOUT
+
+
+@pytest.fixture(scope="module")
+def inference_server(tmp_path_factory):
+    """Imported in a scratch directory so its "Log Folder" never lands in the checkout."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("inference_server"))
+    try:
+        import inference_server
+
+        yield inference_server
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def submitted(inference_server, monkeypatch):
+    """Records the timeout each request reaches the batcher with."""
+    timeouts = []
+
+    async def submit(question, timeout):
+        timeouts.append(timeout)
+        return "SELECT 1;"
+
+    monkeypatch.setattr(inference_server.batcher, "submit", submit)
+    return timeouts
+
+
+@pytest.mark.parametrize("timeout", [0, -1])
+def test_non_positive_timeouts_are_rejected(inference_server, submitted, timeout):
+    response = TestClient(inference_server.app).post(
+        "/generate_sql", json={"question": "q", "timeout": timeout}
+    )
+
+    assert response.status_code == 422
+    assert submitted == []
+
+
+def test_missing_timeout_uses_the_default(inference_server, submitted):
+    client = TestClient(inference_server.app)
+    client.post("/generate_sql", json={"question": "q"})
+    client.post("/generate_sql", json={"question": "q", "timeout": 0.5})
+
+    assert submitted == [INFERENCE_REQUEST_TIMEOUT, 0.5]
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+STREAM_PATH = "/execute_select_sql_query/stream"
+
+
+async def _request_and_disconnect(app, path: str, payload: dict) -> list[str]:
+    """
+    Sends one request straight to the ASGI app from a client that disconnects as
+    soon as the body has been read; returns the types of the messages sent back.
+    """
+    messages = [
+        {"type": "http.request", "body": json.dumps(payload).encode(), "more_body": False}
+    ]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        await asyncio.sleep(0)  # A real server yields to the loop on every send
+        sent.append(message["type"])
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    await app(scope, receive, send)
+    return sent
+
+
+def test_stream_returns_rows_and_trailer(client):
+    response = client.post(
+        STREAM_PATH, json={"sql_query": "SELECT platform FROM test_results LIMIT 3"}
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"columns": ["platform"]}
+    assert len(lines[1:-1]) == 3
+    assert lines[-1] == {"status": "success", "row_count": 3, "truncated": False}
+
+
+def test_dropped_stream_releases_slot_and_connection(server):
+    pending = server.query_executor.metrics()["pending"]
+
+    async def drop_three():
+        for _ in range(3):
+            await _request_and_disconnect(
+                server.app, STREAM_PATH, {"sql_query": "SELECT * FROM test_results"}
+            )
+
+    asyncio.run(drop_three())
+    assert server.query_executor.metrics()["pending"] == pending
+    assert server.db_pool.metrics()["in_use"] == 0
+
+
+def test_paginated_query_ending_in_comment(client):
+    response = client.post(
+        "/execute_select_sql_query",
+        json={
+            "sql_query": "SELECT platform FROM test_results ORDER BY rowid -- note",
+            "page_size": 2,
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["data"]) == 2
+    assert body["next_page_token"]
+
+
+def test_cached_results_keep_each_querys_column_labels(client):
+    columns = [
+        client.post(
+            "/execute_select_sql_query",
+            json={"sql_query": f"SELECT platform AS {alias} FROM test_results LIMIT 1"},
+        ).json()["columns"]
+        for alias in ("P", "p")
+    ]
+    assert columns == [["P"], ["p"]]
+
+
+def test_batch_dedup_keeps_aliases_that_differ_in_case(client):
+    response = client.post(
+        "/execute_select_sql_queries",
+        json={
+            "sql_queries": [
+                "SELECT platform AS P FROM test_results LIMIT 1",
+                "SELECT platform AS p FROM test_results LIMIT 1",
+                "SELECT platform  AS p FROM test_results LIMIT 1;",
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["columns"] for result in results] == [["P"], ["p"], ["p"]]
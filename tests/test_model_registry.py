@@ -0,0 +1,26 @@
+from model_registry import ModelRegistry
+
+
+def _registry():
+    return ModelRegistry(lambda name, precision: (name, precision), max_resident=4)
+
+
+def test_unload_without_precision_drops_every_precision_of_the_name():
+    registry = _registry()
+    for key in [("m", "fp32"), ("m", "int8"), ("other", "fp32")]:
+        registry.get(*key)
+
+    assert registry.unload("m") == 2
+    assert registry.loaded() == [("other", "fp32")]
+
+
+def test_unload_with_precision_drops_only_that_key():
+    registry = _registry()
+    registry.get("m", "fp32")
+    registry.get("m", "int8")
+
+    assert registry.unload("m", "int8") == 1
+    assert registry.unload("missing") == 0
+    assert registry.loaded() == [("m", "fp32")]
+    assert registry.unload() == 1
+    assert registry.loaded() == []
@@ -0,0 +1,32 @@
+import sqlite3
+
+import pytest
+
+from agents.query_executor import execute_query_capped, paginate_query
+
+
+@pytest.fixture
+def connection():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT x FROM t WHERE x > 1 ORDER BY x",
+        "SELECT x FROM t WHERE x > 1 ORDER BY x;",
+        "SELECT x FROM t WHERE x > 1 ORDER BY x -- note",
+        "SELECT x FROM t WHERE x > 1 ORDER BY x; -- note",
+    ],
+)
+def test_paginate_query_fetches_one_page(connection, sql):
+    rows, columns, has_more = execute_query_capped(
+        connection, paginate_query(sql), 3, (4, 2)
+    )
+    assert columns == ["x"]
+    assert [row[0] for row in rows] == [4, 5, 6]
+    assert has_more
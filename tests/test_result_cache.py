@@ -0,0 +1,29 @@
+import pytest
+
+from result_cache import normalize_sql
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("SELECT  platform\nFROM t;", "SELECT platform FROM t"),
+        ("SELECT platform FROM t -- note", "SELECT platform FROM t"),
+        ("SELECT platform /* all */ FROM t;  -- note", "SELECT platform FROM t"),
+    ],
+)
+def test_spellings_share_a_key(first, second):
+    assert normalize_sql(first) == normalize_sql(second)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("SELECT platform AS P FROM t", "SELECT platform AS p FROM t"),
+        ("SELECT SUM(x) FROM t", "SELECT sum(x) FROM t"),
+        ("SELECT * FROM t WHERE s = 'a  b'", "SELECT * FROM t WHERE s = 'a b'"),
+        ("SELECT * FROM t WHERE s = 'A'", "SELECT * FROM t WHERE s = 'a'"),
+        ("SELECT * FROM t WHERE x -- c\nAND y", "SELECT * FROM t WHERE x -- c AND y"),
+    ],
+)
+def test_different_results_get_different_keys(first, second):
+    assert normalize_sql(first) != normalize_sql(second)
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from semantic_cache import entity_key
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Show passed testcases for platform c-6kv", "Get passed testcases for platform c-6kv?"),
+        (
+            "Display testcases executed for test suite sn1",
+            "Can you tell me the executed testcases for test suite sn1?",
+        ),
+    ],
+)
+def test_paraphrases_share_a_key(first, second):
+    assert entity_key(first) is not None
+    assert entity_key(first) == entity_key(second)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Show passed testcases for platform c-6kv", "Show passed testcases excluding platform c-6kv"),
+        ("Show passed testcases for platform c-6kv", "Show passed testcases without platform c-6kv"),
+        ("Show passed testcases for platform c-6kv", "Show passed testcases not on platform c-6kv"),
+        ("Show passed testcases for platform c-6kv", "Show passed testcases only for platform c-6kv"),
+        ("Show passed testcases for release 7.2", "Show passed testcases after release 7.2"),
+        ("Show passed testcases after release 7.2", "Show passed testcases before release 7.2"),
+        ("Show passed testcases for release 7.2", "Show passed testcases since release 7.2"),
+        ("Show passed testcases for test suite sn1", "Show total passed testcases for test suite sn1"),
+        ("Show passed testcases for test suite sn1", "Show passed testcases for test suite sn2"),
+    ],
+)
+def test_different_questions_get_different_keys(first, second):
+    assert entity_key(first) != entity_key(second)
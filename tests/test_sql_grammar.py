@@ -0,0 +1,40 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from agents.sql_grammar import SQLGrammar, SQLGrammarLogitsProcessor
+
+EOS, PAD = 0, 1
+# Token id -> text; an id's text is appended as-is when decoding
+_VOCAB = {
+    EOS: "</s>", PAD: "<pad>", 2: "SELECT", 3: " *", 4: " FROM", 5: " test_results",
+    6: " ", 7: "  ", 8: ";", 9: " WHERE",
+}
+
+
+class _Tokenizer:
+    eos_token_id = EOS
+    all_special_ids = [EOS, PAD]
+
+    def decode(self, ids, skip_special_tokens=False):
+        if skip_special_tokens:
+            ids = [i for i in ids if i not in self.all_special_ids]
+        return "".join(_VOCAB[i] for i in ids)
+
+
+def _allowed(generated: list[int]) -> set[int]:
+    processor = SQLGrammarLogitsProcessor(
+        _Tokenizer(), 0, SQLGrammar("test_results", ["platform"]), top_k=len(_VOCAB)
+    )
+    return set(processor._allowed_tokens(generated, torch.zeros(len(_VOCAB))))
+
+
+def test_special_tokens_are_masked_until_the_statement_is_complete():
+    assert _allowed([2, 3, 4]) == {5, 6, 7}
+    assert _allowed([2, 3, 4, 5]) == {EOS, 6, 7, 8, 9}
+
+
+def test_whitespace_runs_are_capped():
+    assert 7 not in _allowed([2, 3, 4, 5, 6])
+    assert _allowed([2, 3, 4, 5, 7]) == {EOS, 8, 9}
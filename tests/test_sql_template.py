@@ -0,0 +1,52 @@
+import pytest
+
+from agents.sql_template import synthesize_sql
+
+
+@pytest.mark.parametrize(
+    "question, sql",
+    [
+        (
+            "Show passed testcases for test suite sn1?",
+            "SELECT testcases_passed FROM test_results WHERE test_suite = 'sn1';",
+        ),
+        (
+            "Can you tell me passed testcase for test suite sn1?",
+            "SELECT testcases_passed FROM test_results WHERE test_suite = 'sn1';",
+        ),
+        (
+            "Display testcases executed for test suite sn3 and platform c-8kv "
+            "with release version 7.10?",
+            "SELECT testcases_executed FROM test_results WHERE test_suite = 'sn3' "
+            "AND platform = 'c-8kv' AND release_version = '7.10';",
+        ),
+        (
+            "Show passed testcases and executed testcases for platform c-6kv.",
+            "SELECT testcases_executed, testcases_passed FROM test_results "
+            "WHERE platform = 'c-6kv';",
+        ),
+    ],
+)
+def test_fully_understood_questions_use_the_template(question, sql):
+    assert synthesize_sql(question) == sql
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Show testcases passed for platform c-6kv after release 7.2",
+        "Show testcases passed for platform c-6kv since release 7.2",
+        "Show testcases passed for platform c-6kv before release 7.2",
+        "Show testcases passed excluding platform c-6kv",
+        "Show testcases passed without platform c-6kv",
+        "Show testcases passed for platforms other than platform c-6kv",
+        "Show testcases passed only for platform c-6kv",
+        "Show testcases passed and executed for test suite sn1",
+        "Show total testcases passed for test suite sn3?",
+        "Show testcases passed for test suite sn1 and sn2",
+        "Show testcases passed for test suite sn1 on c-8kv",
+        "Show testcases passed for the test suite",
+    ],
+)
+def test_other_phrasings_fall_back_to_the_llm(question):
+    assert synthesize_sql(question) is None
@@ -1,11 +1,16 @@
 import os
 import re
-import torch
-import pandas as pd
+import sys
 import streamlit as st
-from mcp_client import call_mcp_sql_executor
-from config import DB_PATH, CSV_PATH, TABLE_NAME
+from mcp_client import (
+    call_mcp_sql_dataframes,
+    call_mcp_sql_executor_batch,
+    MCPQueryRejectedError,
+)
+from config import DB_PATH, CSV_PATH, TABLE_NAME, MCP_QUERY_MODE
 from db_loader import load_csv_to_sqlite
+from schema_service import get_table_schema
+from agents.sql_analysis import analyze_sql
 from graph_plotting import plot_query_results, extract_conditions_from_sql
 
 # -----------------------------  UI FUNCTIONS  -----------------------------
@@ -34,7 +39,9 @@ def setup_page():
     """
     st.markdown(hide_streamlit_style, unsafe_allow_html=True)
     os.environ["STREAMLIT_SERVER_ENABLE_FILE_WATCHER"] = "false"
-    torch.classes.__path__ = []  # Avoid Torch class path issues
+    torch = sys.modules.get("torch")
+    if torch is not None:  # Not imported when SQL comes from the inference server
+        torch.classes.__path__ = []  # Avoid Torch class path issues
 
 
 # def display_ui_and_get_input():
@@ -115,13 +122,16 @@ def display_ui_and_get_input():
 
 
 def get_schema_hint():
-    """Load CSV to SQLite, return comma-separated column names."""
+    """Ensure the CSV is loaded into SQLite, return comma-separated column names."""
     conn, df = load_csv_to_sqlite(CSV_PATH, TABLE_NAME, DB_PATH)
     if conn:
         conn.close()
 
-    if df is not None and isinstance(df, pd.DataFrame):
-        return ", ".join(df.columns)
+    if df is not None:
+        try:
+            return ", ".join(get_table_schema().column_names)
+        except LookupError as e:
+            logger.error(f"Schema lookup failed: {e}")
 
     st.error(f"No data loaded from '{CSV_PATH}'. Ensure the CSV exists and has data.")
     st.stop()
@@ -179,29 +189,22 @@ def modify_sql_for_visualization(sql_query: str) -> str:
     Modifies the SELECT clause of an SQL query to include all columns ('SELECT *')
     for better visualization, while preserving the WHERE clause.
     """
-    sql_query_lower = sql_query.lower()
+    analysis = analyze_sql(sql_query)
 
     # Check if it's a SELECT query
-    if not sql_query_lower.startswith("select"):
+    if not analysis.is_select:
         logger.warning(
             f"SQL query does not start with SELECT, skipping modification: {sql_query}"
         )
         return sql_query
 
-    # Find the position of 'FROM'
-    from_index = sql_query_lower.find("from")
-    if from_index == -1:
+    if not analysis.simple:
         logger.warning(
-            f"SQL query has no FROM clause, skipping modification: {sql_query}"
+            f"SQL query is not a simple SELECT, skipping modification: {sql_query}"
         )
         return sql_query
 
-    # Extract everything after 'FROM' (including 'FROM' and the table name, and WHERE clause)
-    # This also handles cases with JOINs, GROUP BY, ORDER BY, etc., by keeping them intact
-    rest_of_query = sql_query[from_index:]
-
-    # Construct the new query with SELECT *
-    modified_sql_query = f"SELECT * {rest_of_query}"
+    modified_sql_query = analysis.visualization_sql()
     logger.info(f"Modified SQL for visualization: {modified_sql_query}")
     return modified_sql_query
 
@@ -215,18 +218,7 @@ def _extract_metric_from_select(original_sql_query: str) -> str | None:
     Handles simple SELECTs and common aggregate functions.
     Returns the extracted column name or None if not found/complex.
     """
-    match = re.search(
-        r"SELECT\s+(?:(SUM|COUNT|AVG|MIN|MAX)\s*\(\s*(\w+)\s*\)|(\w+))\s+FROM",
-        original_sql_query,
-        re.IGNORECASE,
-    )
-    if match:
-        if match.group(2):  # Aggregate function (e.g., SUM(column))
-            # Returns the column name inside the aggregate, e.g., 'testcases_passed'
-            return match.group(2)
-        elif match.group(3):  # Direct column selection (e.g., SELECT column)
-            return match.group(3)
-    return None
+    return analyze_sql(original_sql_query).metric_column
 
 
 def extract_selected_columns(sql: str) -> list[str]:
@@ -234,24 +226,7 @@ def extract_selected_columns(sql: str) -> list[str]:
     Extracts column names from the SELECT clause of the SQL query.
     Handles simple expressions and aliases.
     """
-    match = re.search(r"SELECT\s+(.*?)\s+FROM", sql, re.IGNORECASE | re.DOTALL)
-    if not match:
-        return []
-
-    select_clause = match.group(1)
-    if select_clause.strip() == "*":
-        return []
-
-    columns = []
-    for part in select_clause.split(","):
-        col = part.strip()
-        if " as " in col.lower():
-            col = col.split(" as ")[0].strip()
-        func_match = re.match(r"(sum|count|avg|min|max)\((.*?)\)", col, re.IGNORECASE)
-        if func_match:
-            col = func_match.group(2).strip()
-        columns.append(col)
-    return columns
+    return analyze_sql(sql).selected_columns
 
 
 def handle_sql_query_execution(sql_query_for_mcp: str, original_sql_query: str):
@@ -260,21 +235,17 @@ def handle_sql_query_execution(sql_query_for_mcp: str, original_sql_query: str):
         return
 
     try:
-        mcp_result_full = call_mcp_sql_executor(sql_query_for_mcp)
-        mcp_result_user = call_mcp_sql_executor(original_sql_query)
-
-        if (
-            mcp_result_user.get("status") == "success"
-            and mcp_result_user.get("data")
-            and mcp_result_full.get("status") == "success"
-            and mcp_result_full.get("data")
-        ):
-            df_user = pd.DataFrame(
-                mcp_result_user["data"], columns=mcp_result_user["columns"]
-            )
-            df_full = pd.DataFrame(
-                mcp_result_full["data"], columns=mcp_result_full["columns"]
-            )
+        queries = [sql_query_for_mcp, original_sql_query]
+        if MCP_QUERY_MODE == "concurrent":
+            # Two requests in flight at once; latency is the slower of the two
+            df_full, df_user = call_mcp_sql_dataframes(queries)
+        else:
+            # Both queries run in one round trip against the same snapshot
+            df_full, df_user = call_mcp_sql_executor_batch(queries)
+
+        if not df_user.empty and not df_full.empty:
+            if df_user.attrs.get("truncated") or df_full.attrs.get("truncated"):
+                st.warning("Result was truncated to the server's row limit.")
 
             context_cols = ["test_suite", "platform", "version"]
             for col in context_cols:
@@ -291,16 +262,14 @@ def handle_sql_query_execution(sql_query_for_mcp: str, original_sql_query: str):
             st.session_state.df_full = df_full
 
             # Chart data setup
-            full_data = mcp_result_full["data"]
-            full_cols = mcp_result_full["columns"]
+            full_data = df_full.to_dict("records")
+            full_cols = list(df_full.columns)
             metric_col = _extract_metric_from_select(original_sql_query)
 
             if not metric_col:
                 from utils import detect_metric_column
 
-                metric_col = detect_metric_column(
-                    pd.DataFrame(full_data, columns=full_cols), full_cols
-                )
+                metric_col = detect_metric_column(df_full, full_cols)
 
             if metric_col and metric_col in full_cols:
                 st.session_state.full_data = full_data
@@ -314,6 +283,12 @@ def handle_sql_query_execution(sql_query_for_mcp: str, original_sql_query: str):
         else:
             st.warning("Query returned no results.")
 
+    except MCPQueryRejectedError as e:
+        st.error(
+            f"The query was stopped by a server safety limit ({e.guard}): "
+            f"{e.detail.get('message')}"
+        )
+
     except Exception as e:
         st.error(f"Error: {e}")
 